@@ -1,18 +1,286 @@
-from sentence_transformers import SentenceTransformer, util
 import numpy as np
+import asyncio
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from scipy.sparse.csgraph import connected_components
+
+from agents.models import get_sentence_transformer, get_onnx_encoder
+from agents.dedup.lsh import MinHashIndex, MinHashLSH, shingles
+from agents.dedup.bloom import RollingBloomFilter, hash_shingles64
+from agents.dedup.similarity import threshold_edges, threshold_edges_torch, neighbor_graph
+from agents.dedup.store import EmbeddingStore
+
+try:
+    from blake3 import blake3 as _content_hasher
+except ImportError:
+    _content_hasher = hashlib.sha256
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+
+def _cuda_available():
+    """Whether torch is installed and can see a CUDA device."""
+    try:
+        import torch
+    except ImportError:
+        return False
+    return torch.cuda.is_available()
+
+
+def content_hash(text):
+    """64-bit hash of the lowercased, whitespace-collapsed text for exact-duplicate checks."""
+    normalized = re.sub(r"\s+", " ", text.lower()).strip()
+    return int.from_bytes(_content_hasher(normalized.encode("utf-8")).digest()[:8], "little")
 
 
 class DeduplicationAgent:
-    def __init__(self, model_name="sentence-transformers/all-mpnet-base-v2", threshold=0.80):
+    def __init__(self, model_name="sentence-transformers/all-mpnet-base-v2", threshold=0.80, lsh_min_batch=2000, batch_size=64, block_size=512, onnx_model_path=None, history_neighbors=8, store_dir=None, shingle_overlap=0.7, bloom_capacity=1_000_000, seen_hash_capacity=100_000):
         """
         Initialize the DeduplicationAgent with a sentence transformer model.
         
         Args:
             model_name: HuggingFace model for encoding text
             threshold: Cosine similarity threshold for detecting duplicates (0-1)
+            lsh_min_batch: Batch size from which MinHash-LSH candidate search
+                replaces the dense pairwise similarity matrix
+            batch_size: Number of texts per encoder forward pass
+            block_size: Tile size for the thresholded similarity search
+            onnx_model_path: Directory of an int8 ONNX export of the model
+                (defaults to DEDUP_ONNX_MODEL env var); uses ONNX Runtime
+                instead of PyTorch for encoding when set
+            history_neighbors: Neighbours fetched per article from the FAISS
+                index of articles kept in earlier runs (faiss-cpu, in the
+                requirements; without it earlier runs are only matched by
+                exact search over the store, when store_dir is set)
+            store_dir: Directory of the memory-mapped embedding history
+                (defaults to DEDUP_STORE_DIR env var); keeps cross-run
+                dedup state across restarts when set. Article ids must be
+                integers.
+            shingle_overlap: Share of an article's shingles already seen in
+                earlier runs from which it is merged, without being encoded,
+                under the earlier article its MinHash bands match (None
+                disables the check)
+            bloom_capacity: Shingles per generation of the rolling Bloom filter
+            seen_hash_capacity: Content hashes remembered for the exact
+                duplicate check, and kept articles indexed for the shingle
+                check (least recently seen are dropped)
         """
-        self.model = SentenceTransformer(model_name)
+        onnx_model_path = onnx_model_path or os.getenv("DEDUP_ONNX_MODEL")
+        
+        if onnx_model_path:
+            self.model = get_onnx_encoder(onnx_model_path)
+            self.use_gpu = False
+        else:
+            # Shared across agents; half precision on GPU
+            self.model = get_sentence_transformer(model_name)
+            self.use_gpu = _cuda_available()
+        
         self.threshold = threshold
+        self.batch_size = batch_size
+        self.block_size = block_size
+        self.lsh_min_batch = lsh_min_batch
+        self.lsh = MinHashLSH(num_perm=128, bands=16)
+        
+        # Content hash -> id of the representative its article was kept or
+        # merged under (LRU)
+        self.seen_hash_capacity = seen_hash_capacity
+        self._seen_hashes = OrderedDict()
+        
+        # Shingles of kept articles from earlier runs; syndicated copies that
+        # only differ in boilerplate are rejected before encoding
+        self.shingle_overlap = shingle_overlap
+        self.shingle_min_count = 8
+        self._shingle_bloom = RollingBloomFilter(bloom_capacity, error_rate=1e-4)
+        
+        # Which kept article a flagged copy matches (the Bloom filter only
+        # says its shingles were seen)
+        self._shingle_index = MinHashIndex(self.lsh, capacity=seen_hash_capacity)
+        
+        # run_async work is serialised on one thread: torch already uses all
+        # cores for encoding, and runs share the dedup history
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dedup")
+        
+        # Embeddings of unique articles from earlier runs for cross-run dedup;
+        # the HNSW index is created on first use once the dimension is known
+        self.history_neighbors = history_neighbors
+        self.index = None
+        self.index_ids = []
+        self._indexed = set()
+        
+        # Persistent history: reload hashes and embeddings of earlier runs
+        # (the store is created on first write, once the dimension is known)
+        self.store_dir = store_dir or os.getenv("DEDUP_STORE_DIR")
+        self.store = None
+        
+        if self.store_dir and EmbeddingStore.exists(self.store_dir):
+            self.store = EmbeddingStore(self.store_dir)
+            ids = self.store.ids.tolist()
+            for digest, article_id in zip(self.store.hashes.tolist(), ids):
+                self._remember_hash(digest, article_id)
+            self._add_to_index(self.store.embeddings.astype(np.float32), ids)
+    
+    def _encode(self, texts):
+        """Encode texts into L2-normalized float32 embeddings."""
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype(np.float32)
+    
+    def _gpu_edges(self, texts):
+        """
+        Encode and search on the GPU, copying back only embeddings and edges.
+        
+        Returns:
+            Tuple of (float32 embeddings, rows, cols)
+        """
+        embeddings = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_tensor=True,
+            normalize_embeddings=True
+        )
+        rows, cols = threshold_edges_torch(embeddings, self.threshold)
+        
+        return embeddings.float().cpu().numpy(), rows, cols
+    
+    def _dense_edges(self, embeddings):
+        """Similar pairs from a tiled, upper-triangle similarity search."""
+        return threshold_edges(embeddings, self.threshold, self.block_size)
+    
+    def _lsh_edges(self, texts, embeddings):
+        """
+        Similar pairs from MinHash-LSH candidates verified by embedding cosine.
+        
+        Only candidate pairs produced by the LSH index are compared, so the
+        N x N similarity matrix is never materialised. Near-duplicates with
+        little lexical overlap can be missed, which is why this path is only
+        used for large batches.
+        """
+        pairs = self.lsh.candidate_pairs(texts)
+        
+        if not pairs:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        
+        rows, cols = np.array(sorted(pairs), dtype=np.int64).T
+        scores = np.einsum("ij,ij->i", embeddings[rows], embeddings[cols])
+        keep = scores >= self.threshold
+        
+        return rows[keep], cols[keep]
+    
+    def _history_matches(self, embeddings, batch_ids):
+        """
+        Best match among articles kept in earlier runs.
+        
+        Args:
+            embeddings: Normalized embeddings of the fresh articles
+            batch_ids: Ids of every article in the current batch
+        
+        Returns:
+            dict of fresh index -> (score, id of the earlier article)
+        """
+        if self.index is None or self.index.ntotal == 0:
+            return self._store_matches(embeddings, batch_ids)
+        
+        scores, neighbors = self.index.search(embeddings, min(self.history_neighbors, self.index.ntotal))
+        
+        matches = {}
+        for i in range(len(embeddings)):
+            for score, j in zip(scores[i], neighbors[i]):
+                # Results are sorted by score; -1 pads missing neighbours
+                if j < 0 or score < self.threshold:
+                    break
+                
+                # Re-submitted articles are not duplicates of themselves
+                match_id = self.index_ids[j]
+                if match_id in batch_ids:
+                    continue
+                
+                matches[i] = (float(score), match_id)
+                break
+        
+        return matches
+    
+    def _store_matches(self, embeddings, batch_ids):
+        """Exact history search over the memory-mapped store (no faiss)."""
+        if self.store is None or not len(self.store):
+            return {}
+        
+        matches = {}
+        stored_ids = self.store.ids
+        for i, (score, row) in self.store.best_matches(embeddings, self.threshold).items():
+            match_id = int(stored_ids[row])
+            if match_id not in batch_ids:
+                matches[i] = (score, match_id)
+        
+        return matches
+    
+    def _remember(self, embeddings, ids, hashes):
+        """Add embeddings of newly kept articles to the cross-run history."""
+        # Re-submitted articles are already in the history
+        new = [i for i, article_id in enumerate(ids) if article_id not in self._indexed]
+        if not new:
+            return
+        
+        if self.store is None and self.store_dir:
+            self.store = EmbeddingStore(self.store_dir, dim=embeddings.shape[1])
+        
+        if self.store is not None:
+            self.store.append(embeddings[new], (ids[i] for i in new), (hashes[i] for i in new))
+        
+        self._add_to_index(embeddings[new], [ids[i] for i in new])
+    
+    def _remember_hash(self, digest, main_id):
+        """Map a content hash to its cluster representative, evicting the oldest hashes."""
+        self._seen_hashes[digest] = main_id
+        self._seen_hashes.move_to_end(digest)
+        
+        while len(self._seen_hashes) > self.seen_hash_capacity:
+            self._seen_hashes.popitem(last=False)
+    
+    def _seen_shingles(self, shingle_hashes):
+        """Whether most of an article's shingles were seen in earlier runs."""
+        if self.shingle_overlap is None or len(shingle_hashes) < self.shingle_min_count:
+            return False
+        
+        return self._shingle_bloom.contains(shingle_hashes).mean() >= self.shingle_overlap
+    
+    def _add_to_index(self, embeddings, ids):
+        """Add embeddings to the FAISS index, creating it on first use."""
+        self._indexed.update(ids)
+        if faiss is None or not ids:
+            return
+        
+        if self.index is None:
+            self.index = faiss.IndexHNSWFlat(embeddings.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+            self.index.hnsw.efSearch = 64
+        
+        self.index.add(np.ascontiguousarray(embeddings))
+        self.index_ids.extend(ids)
+    
+    async def run_async(self, articles):
+        """
+        Deduplicate articles without blocking the event loop.
+        
+        Encoding and similarity search run on the agent's worker thread, so
+        other ingestion and database I/O can proceed in the meantime.
+        
+        Args:
+            articles: List of dicts with 'id' and 'text' keys
+        
+        Returns:
+            Same as run()
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.run, articles)
     
     def run(self, articles):
         """
@@ -20,7 +288,7 @@ class DeduplicationAgent:
         
         Args:
             articles: List of dicts with 'id' and 'text' keys
-            
+        
         Returns:
             {
                 "unique_articles": [...],
@@ -30,44 +298,129 @@ class DeduplicationAgent:
         if not articles:
             return {"unique_articles": [], "clusters": []}
         
-        # Extract texts and encode them
-        texts = [article["text"] for article in articles]
-        embeddings = self.model.encode(texts, convert_to_tensor=True)
+        # Exact-duplicate fast path: only articles with new content get encoded
+        fresh = []
+        exact_duplicates = {}  # index in fresh -> duplicate articles in this batch
+        batch_hashes = {}  # content hash -> index in fresh
+        fresh_hashes = []
+        fresh_shingles = []
+        prior_duplicates = {}  # id seen in an earlier run -> duplicate ids
         
-        # Compute pairwise cosine similarities
-        similarities = util.cos_sim(embeddings, embeddings).cpu().numpy()
+        for article in articles:
+            digest = content_hash(article["text"])
+            
+            if digest in batch_hashes:
+                exact_duplicates[batch_hashes[digest]].append(article)
+                continue
+            
+            # Re-submitting the same article id is not a duplicate of itself
+            first_id = self._seen_hashes.get(digest)
+            if first_id is not None:
+                self._seen_hashes.move_to_end(digest)
+                if first_id != article["id"]:
+                    prior_duplicates.setdefault(first_id, []).append(article["id"])
+                    continue
+            
+            # Checked against earlier runs only; re-submitted articles are kept
+            shingle_hashes = None
+            if self.shingle_overlap is not None:
+                shingle_hashes = hash_shingles64(shingles(article["text"]))
+            if article["id"] not in self._indexed and self._seen_shingles(shingle_hashes):
+                # Merged under the earlier article it copies; without a
+                # match it is encoded and deduplicated like any other
+                main_id = self._shingle_index.query(shingle_hashes)
+                if main_id is not None:
+                    prior_duplicates.setdefault(main_id, []).append(article["id"])
+                    self._remember_hash(digest, main_id)
+                    continue
+            
+            batch_hashes[digest] = len(fresh)
+            fresh_hashes.append(digest)
+            fresh_shingles.append(shingle_hashes)
+            exact_duplicates[len(fresh)] = []
+            fresh.append(article)
         
-        # Track which articles have been merged
-        visited = set()
         unique_articles = []
-        clusters = []
+        clusters = [
+            {"main_id": main_id, "merged_ids": merged_ids}
+            for main_id, merged_ids in prior_duplicates.items()
+        ]
         
-        for i, article in enumerate(articles):
-            if i in visited:
-                continue
-            
-            # Find all similar articles (including self)
-            similar_indices = np.where(similarities[i] >= self.threshold)[0]
+        if not fresh:
+            return {"unique_articles": unique_articles, "clusters": clusters}
+        
+        # Extract texts and find similar articles for each one
+        texts = [article["text"] for article in fresh]
+        
+        if len(texts) >= self.lsh_min_batch:
+            embeddings = self._encode(texts)
+            rows, cols = self._lsh_edges(texts, embeddings)
+        elif self.use_gpu:
+            embeddings, rows, cols = self._gpu_edges(texts)
+        else:
+            embeddings = self._encode(texts)
+            rows, cols = self._dense_edges(embeddings)
+        
+        graph = neighbor_graph(len(texts), rows, cols)
+        
+        # Group transitively similar articles (A~B, B~C puts A, B, C together)
+        _, labels = connected_components(graph, directed=False)
+        
+        # Representative is the earliest article of each component
+        _, first_index = np.unique(labels, return_index=True)
+        first_index.sort()
+        members = np.argsort(labels, kind="stable")
+        bounds = np.cumsum(np.bincount(labels))
+        
+        history = self._history_matches(embeddings, {article["id"] for article in articles})
+        kept = []
+        
+        for rep in first_index:
+            label = labels[rep]
+            start = bounds[label - 1] if label > 0 else 0
+            component = members[start:bounds[label]]
             
-            # Filter out already visited articles
-            similar_indices = [idx for idx in similar_indices if idx not in visited]
+            # Create cluster info, folding in exact duplicates of each member
+            merged_ids = []
+            for idx in component:
+                merged_ids.append(fresh[idx]["id"])
+                merged_ids.extend(dup["id"] for dup in exact_duplicates[idx])
             
-            if not similar_indices:
+            # Stories already kept in an earlier run merge under that article
+            earlier = [history[idx] for idx in component if idx in history]
+            if earlier:
+                main_id = max(earlier, key=lambda match: match[0])[1]
+                for idx in component:
+                    self._remember_hash(fresh_hashes[idx], main_id)
+                clusters.append({
+                    "main_id": main_id,
+                    "merged_ids": merged_ids
+                })
                 continue
             
-            # Use the first article as the representative
-            main_article = articles[similar_indices[0]]
-            unique_articles.append(main_article)
+            # Later exact copies of any member are reported against the
+            # representative
+            for idx in component:
+                self._remember_hash(fresh_hashes[idx], fresh[rep]["id"])
             
-            # Create cluster info
-            merged_ids = [articles[idx]["id"] for idx in similar_indices]
+            main_article = fresh[rep]
+            unique_articles.append(main_article)
+            kept.append(rep)
             clusters.append({
                 "main_id": main_article["id"],
                 "merged_ids": merged_ids
             })
-            
-            # Mark all similar articles as visited
-            visited.update(similar_indices)
+        
+        self._remember(
+            embeddings[kept],
+            [fresh[idx]["id"] for idx in kept],
+            [fresh_hashes[idx] for idx in kept]
+        )
+        
+        if self.shingle_overlap is not None:
+            for idx in kept:
+                self._shingle_bloom.add(fresh_shingles[idx])
+                self._shingle_index.add(fresh[idx]["id"], fresh_shingles[idx])
         
         return {
             "unique_articles": unique_articles,
@@ -0,0 +1,100 @@
+"""
+Rolling Bloom Filter
+
+Bounded-memory membership test for shingle hashes. Two generations are
+kept: inserts go to the active filter, lookups check both, and once the
+active filter holds `capacity` items it becomes the old one and a fresh
+filter takes its place. Memory stays at two filters no matter how long the
+scheduler runs, and shingles age out after one to two generations.
+"""
+
+import hashlib
+import math
+from typing import Iterable
+
+import numpy as np
+
+
+def hash_shingles64(items: Iterable[str]) -> np.ndarray:
+    """Hash shingles to 64-bit integers (two independent halves for double hashing)."""
+    return np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "little")
+            for item in items
+        ),
+        dtype=np.uint64
+    )
+
+
+class RollingBloomFilter:
+    """Two-generation Bloom filter over 64-bit hashes."""
+    
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 1e-4):
+        """
+        Size the filters for the expected items per generation.
+        
+        Args:
+            capacity: Items inserted before the generations rotate
+            error_rate: Target false-positive rate of one full filter
+        """
+        self.capacity = capacity
+        self.num_bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        
+        self._active = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self._old = np.zeros_like(self._active)
+        self._active_count = 0
+    
+    def __len__(self) -> int:
+        """Number of items inserted into the active generation."""
+        return self._active_count
+    
+    def _positions(self, hashes: np.ndarray) -> np.ndarray:
+        """Bit positions of each hash, shape (n, num_hashes)."""
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(self.num_bits)
+    
+    @staticmethod
+    def _test(bits: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """Whether every position of each row is set in bits."""
+        byte = bits[positions >> np.uint64(3)]
+        mask = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+        return ((byte & mask) != 0).all(axis=1)
+    
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Membership of each hash in either generation.
+        
+        Args:
+            hashes: uint64 hashes
+        
+        Returns:
+            Boolean array, True where the hash was (probably) inserted
+        """
+        if len(hashes) == 0:
+            return np.zeros(0, dtype=bool)
+        
+        positions = self._positions(hashes)
+        return self._test(self._active, positions) | self._test(self._old, positions)
+    
+    def add(self, hashes: np.ndarray):
+        """
+        Insert hashes into the active generation, rotating when it is full.
+        
+        Args:
+            hashes: uint64 hashes
+        """
+        if len(hashes) == 0:
+            return
+        
+        if self._active_count + len(hashes) > self.capacity:
+            self._old = self._active
+            self._active = np.zeros_like(self._old)
+            self._active_count = 0
+        
+        positions = self._positions(hashes).ravel()
+        masks = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+        np.bitwise_or.at(self._active, positions >> np.uint64(3), masks)
+        self._active_count += len(hashes)
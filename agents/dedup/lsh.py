@@ -0,0 +1,171 @@
+"""
+MinHash LSH Index
+
+Generates near-duplicate candidate pairs from word shingles so that only a
+small set of article pairs needs an embedding similarity check.
+"""
+
+import re
+import zlib
+from collections import Counter, OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+# Mersenne prime used for the universal hash family (fits a*x in uint64)
+_PRIME = np.uint64((1 << 31) - 1)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = 5) -> Set[str]:
+    """
+    Build the set of word n-gram shingles for a text.
+    
+    Args:
+        text: Input text
+        size: Number of words per shingle
+    
+    Returns:
+        Set of shingles (a text shorter than `size` yields a single shingle)
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def hash_shingles(items: Iterable[str]) -> np.ndarray:
+    """Hash shingles to 32-bit integers stored as uint64."""
+    return np.fromiter(
+        (zlib.crc32(item.encode("utf-8")) for item in items),
+        dtype=np.uint64
+    )
+
+
+class MinHashLSH:
+    """MinHash signatures with banded locality-sensitive hashing."""
+    
+    def __init__(self, num_perm: int = 128, bands: int = 16, seed: int = 42):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+        
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+    
+    def signature(self, hashed: np.ndarray) -> np.ndarray:
+        """
+        Compute the MinHash signature of a set of hashed shingles.
+        
+        Args:
+            hashed: uint64 array of shingle hashes
+        
+        Returns:
+            uint64 array of length num_perm
+        """
+        if hashed.size == 0:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        
+        values = hashed % _PRIME
+        permuted = (self._a[:, None] * values[None, :] + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1)
+    
+    def candidate_pairs(self, texts: List[str], shingle_size: int = 5) -> Set[Tuple[int, int]]:
+        """
+        Find candidate near-duplicate pairs among texts.
+        
+        Two texts become a candidate pair when any band of their signatures
+        collides.
+        
+        Args:
+            texts: List of texts
+            shingle_size: Number of words per shingle
+        
+        Returns:
+            Set of (i, j) index pairs with i < j
+        """
+        buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        
+        for idx, text in enumerate(texts):
+            sig = self.signature(hash_shingles(shingles(text, shingle_size)))
+            for band in range(self.bands):
+                key = sig[band * self.rows:(band + 1) * self.rows].tobytes()
+                buckets[band].setdefault(key, []).append(idx)
+        
+        pairs = set()
+        for band_buckets in buckets:
+            for members in band_buckets.values():
+                if len(members) < 2:
+                    continue
+                for pos, i in enumerate(members):
+                    for j in members[pos + 1:]:
+                        pairs.add((i, j))
+        
+        return pairs
+
+
+class MinHashIndex:
+    """
+    Banded MinHash index of kept articles, queried for the article a new
+    text most likely copies.
+    
+    Holds the most recently added articles up to capacity; older ones are
+    dropped together with their band keys.
+    """
+    
+    def __init__(self, lsh: MinHashLSH, capacity: int = 100_000):
+        self.lsh = lsh
+        self.capacity = capacity
+        self._buckets: List[Dict[bytes, Hashable]] = [{} for _ in range(lsh.bands)]
+        self._keys: "OrderedDict[Hashable, List[bytes]]" = OrderedDict()
+    
+    def _band_keys(self, hashed: np.ndarray) -> List[bytes]:
+        """Band keys of the signature of a set of hashed shingles."""
+        sig = self.lsh.signature(hashed)
+        rows = self.lsh.rows
+        return [sig[band * rows:(band + 1) * rows].tobytes() for band in range(self.lsh.bands)]
+    
+    def add(self, item_id: Hashable, hashed: np.ndarray):
+        """
+        Index an article's hashed shingles under its id.
+        
+        Args:
+            item_id: Article id returned by query
+            hashed: uint64 array of shingle hashes
+        """
+        keys = self._band_keys(hashed)
+        for band, key in enumerate(keys):
+            self._buckets[band][key] = item_id
+        self._keys[item_id] = keys
+        self._keys.move_to_end(item_id)
+        
+        while len(self._keys) > self.capacity:
+            old_id, old_keys = self._keys.popitem(last=False)
+            for band, key in enumerate(old_keys):
+                if self._buckets[band].get(key) == old_id:
+                    del self._buckets[band][key]
+    
+    def query(self, hashed: np.ndarray) -> Optional[Hashable]:
+        """
+        Id of the indexed article sharing the most bands with a text.
+        
+        Args:
+            hashed: uint64 array of shingle hashes
+        
+        Returns:
+            Matching article id, or None if no band collides
+        """
+        hits = Counter(
+            self._buckets[band][key]
+            for band, key in enumerate(self._band_keys(hashed))
+            if key in self._buckets[band]
+        )
+        return hits.most_common(1)[0][0] if hits else None
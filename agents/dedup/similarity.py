@@ -0,0 +1,181 @@
+"""
+Thresholded Similarity Search
+
+Finds article pairs whose cosine similarity clears the dedup threshold
+without materialising the full N x N similarity matrix.
+"""
+
+from typing import Tuple
+
+import numpy as np
+from scipy import sparse
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _collect_edges(sim_block, threshold, i0, j0, diagonal):
+        """
+        Threshold a similarity tile and write its edges in one fused kernel.
+        
+        Rows are counted in parallel, then filled into exactly sized COO
+        buffers, so no boolean mask or intermediate index arrays are built.
+        """
+        m, k = sim_block.shape
+        counts = np.zeros(m, dtype=np.int64)
+        
+        for a in prange(m):
+            count = 0
+            for b in range(a + 1 if diagonal else 0, k):
+                if sim_block[a, b] >= threshold:
+                    count += 1
+            counts[a] = count
+        
+        offsets = np.zeros(m + 1, dtype=np.int64)
+        for a in range(m):
+            offsets[a + 1] = offsets[a] + counts[a]
+        
+        rows = np.empty(offsets[m], dtype=np.int64)
+        cols = np.empty(offsets[m], dtype=np.int64)
+        
+        for a in prange(m):
+            pos = offsets[a]
+            for b in range(a + 1 if diagonal else 0, k):
+                if sim_block[a, b] >= threshold:
+                    rows[pos] = a + i0
+                    cols[pos] = b + j0
+                    pos += 1
+        
+        return rows, cols
+
+
+def threshold_edges(
+    embeddings: np.ndarray,
+    threshold: float,
+    block_size: int = 512,
+    use_numba: bool = True
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find all pairs (i, j), i < j, with embeddings[i] . embeddings[j] >= threshold.
+    
+    Only the upper triangle is computed, one block_size x block_size tile at
+    a time, so peak memory is a single tile rather than N x N floats. With
+    numba (in the requirements), thresholding and edge collection for each
+    tile run as one fused parallel pass; without it they fall back to
+    numpy compare, nonzero and triangle masking.
+    
+    Args:
+        embeddings: L2-normalized embeddings, shape (N, D)
+        threshold: Cosine similarity threshold
+        block_size: Tile edge length
+        use_numba: Use the fused kernel when numba is available
+    
+    Returns:
+        Tuple of (rows, cols) int64 index arrays
+    """
+    n = embeddings.shape[0]
+    rows, cols = [], []
+    fused = use_numba and njit is not None
+    
+    for i0 in range(0, n, block_size):
+        block_i = embeddings[i0:i0 + block_size]
+        
+        for j0 in range(i0, n, block_size):
+            sim_block = block_i @ embeddings[j0:j0 + block_size].T
+            
+            if fused:
+                ii, jj = _collect_edges(sim_block, sim_block.dtype.type(threshold), i0, j0, i0 == j0)
+                rows.append(ii)
+                cols.append(jj)
+                continue
+            
+            ii, jj = np.nonzero(sim_block >= threshold)
+            ii += i0
+            jj += j0
+            
+            # Diagonal tiles hold both triangles and the self-similarity
+            if i0 == j0:
+                upper = ii < jj
+                ii, jj = ii[upper], jj[upper]
+            
+            rows.append(ii)
+            cols.append(jj)
+    
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    
+    return np.concatenate(rows).astype(np.int64), np.concatenate(cols).astype(np.int64)
+
+
+def threshold_edges_torch(
+    embeddings,
+    threshold: float,
+    block_size: int = 4096
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    GPU variant of threshold_edges for embeddings held as a CUDA tensor.
+    
+    Tiles are multiplied, thresholded and reduced to edge indices on the
+    device; only the edge list is copied back to the host. Half-precision
+    embeddings run the matmul on tensor cores.
+    
+    Args:
+        embeddings: L2-normalized torch.Tensor, shape (N, D)
+        threshold: Cosine similarity threshold
+        block_size: Tile edge length
+    
+    Returns:
+        Tuple of (rows, cols) int64 index arrays
+    """
+    import torch
+    
+    n = embeddings.shape[0]
+    rows, cols = [], []
+    
+    for i0 in range(0, n, block_size):
+        block_i = embeddings[i0:i0 + block_size]
+        
+        for j0 in range(i0, n, block_size):
+            mask = (block_i @ embeddings[j0:j0 + block_size].T) >= threshold
+            
+            # Diagonal tiles hold both triangles and the self-similarity
+            if i0 == j0:
+                mask = mask.triu(1)
+            
+            ii, jj = mask.nonzero(as_tuple=True)
+            rows.append(ii + i0)
+            cols.append(jj + j0)
+    
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    
+    return (
+        torch.cat(rows).cpu().numpy().astype(np.int64),
+        torch.cat(cols).cpu().numpy().astype(np.int64)
+    )
+
+
+def neighbor_graph(n: int, rows: np.ndarray, cols: np.ndarray) -> sparse.csr_matrix:
+    """
+    Build a symmetric CSR adjacency matrix (self-loops included) from edges.
+    
+    Args:
+        n: Number of nodes
+        rows: Edge source indices
+        cols: Edge target indices
+    
+    Returns:
+        n x n boolean CSR matrix with sorted column indices per row
+    """
+    diagonal = np.arange(n, dtype=np.int64)
+    all_rows = np.concatenate([rows, cols, diagonal])
+    all_cols = np.concatenate([cols, rows, diagonal])
+    data = np.ones(all_rows.size, dtype=bool)
+    
+    graph = sparse.csr_matrix((data, (all_rows, all_cols)), shape=(n, n))
+    graph.sort_indices()
+    return graph
@@ -0,0 +1,183 @@
+"""
+Embedding Store
+
+Memory-mapped history of the articles kept by DeduplicationAgent, so
+scheduler runs only encode new articles and still dedup against everything
+seen before, including across process restarts.
+
+Data is stored as a structure of arrays in one directory:
+    embeddings.f16  float16 matrix, shape (capacity, dim)
+    ids.i64         int64 article ids, shape (capacity,)
+    hashes.u64      uint64 content hashes, shape (capacity,)
+    meta.json       row count, capacity and dimension
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+
+class EmbeddingStore:
+    """Append-only, memory-mapped store of normalized article embeddings."""
+    
+    def __init__(self, directory: str, dim: int = 768, initial_capacity: int = 1024):
+        """
+        Open the store, creating it if the directory is empty.
+        
+        Args:
+            directory: Directory holding the store files
+            dim: Embedding dimension (ignored when the store already exists)
+            initial_capacity: Rows allocated for a new store
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._meta_path = self.directory / "meta.json"
+        
+        if self._meta_path.exists():
+            with open(self._meta_path, 'r') as f:
+                meta = json.load(f)
+            self.count = meta["count"]
+            self.capacity = meta["capacity"]
+            self.dim = meta["dim"]
+            self._open("r+")
+        else:
+            self.count = 0
+            self.capacity = initial_capacity
+            self.dim = dim
+            self._open("w+")
+            self._write_meta()
+    
+    @staticmethod
+    def exists(directory: str) -> bool:
+        """Whether a store has already been created in directory."""
+        return (Path(directory) / "meta.json").exists()
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    @property
+    def embeddings(self) -> np.ndarray:
+        """Stored embeddings, shape (count, dim)."""
+        return self._emb[:self.count]
+    
+    @property
+    def ids(self) -> np.ndarray:
+        """Stored article ids, shape (count,)."""
+        return self._ids[:self.count]
+    
+    @property
+    def hashes(self) -> np.ndarray:
+        """Stored content hashes, shape (count,)."""
+        return self._hashes[:self.count]
+    
+    def append(self, embeddings: np.ndarray, ids: Iterable[int], hashes: Iterable[int]):
+        """
+        Append rows, doubling the capacity when the files are full.
+        
+        Args:
+            embeddings: Normalized embeddings, shape (n, dim)
+            ids: Integer article ids
+            hashes: 64-bit content hashes
+        """
+        n = len(embeddings)
+        if n == 0:
+            return
+        
+        if self.count + n > self.capacity:
+            capacity = self.capacity
+            while self.count + n > capacity:
+                capacity *= 2
+            self._grow(capacity)
+        
+        end = self.count + n
+        self._emb[self.count:end] = embeddings
+        self._ids[self.count:end] = np.fromiter(ids, dtype=np.int64, count=n)
+        self._hashes[self.count:end] = np.fromiter(hashes, dtype=np.uint64, count=n)
+        self.count = end
+        
+        self.flush()
+    
+    def best_matches(
+        self,
+        queries: np.ndarray,
+        threshold: float,
+        block_size: int = 4096
+    ) -> Dict[int, Tuple[float, int]]:
+        """
+        Most similar stored row for each query that clears the threshold.
+        
+        Args:
+            queries: Normalized query embeddings, shape (n, dim)
+            threshold: Cosine similarity threshold
+            block_size: Stored rows compared per matmul
+        
+        Returns:
+            dict of query index -> (score, stored row index)
+        """
+        best_scores = np.full(len(queries), -np.inf, dtype=np.float32)
+        best_rows = np.full(len(queries), -1, dtype=np.int64)
+        queries = queries.astype(np.float32)
+        
+        for start in range(0, self.count, block_size):
+            block = self._emb[start:min(start + block_size, self.count)].astype(np.float32)
+            sims = queries @ block.T
+            
+            rows = sims.argmax(axis=1)
+            scores = sims[np.arange(len(queries)), rows]
+            better = scores > best_scores
+            best_scores[better] = scores[better]
+            best_rows[better] = rows[better] + start
+        
+        return {
+            int(i): (float(best_scores[i]), int(best_rows[i]))
+            for i in np.flatnonzero(best_scores >= threshold)
+        }
+    
+    def flush(self):
+        """Write pending changes and the row count to disk."""
+        self._emb.flush()
+        self._ids.flush()
+        self._hashes.flush()
+        self._write_meta()
+    
+    def _open(self, mode: str):
+        """Map the array files with the current capacity."""
+        self._emb = np.memmap(
+            self.directory / "embeddings.f16", dtype=np.float16, mode=mode,
+            shape=(self.capacity, self.dim)
+        )
+        self._ids = np.memmap(
+            self.directory / "ids.i64", dtype=np.int64, mode=mode,
+            shape=(self.capacity,)
+        )
+        self._hashes = np.memmap(
+            self.directory / "hashes.u64", dtype=np.uint64, mode=mode,
+            shape=(self.capacity,)
+        )
+    
+    def _grow(self, capacity: int):
+        """Extend the files to the new capacity and remap them."""
+        self.flush()
+        del self._emb, self._ids, self._hashes
+        
+        for name, row_bytes in (
+            ("embeddings.f16", self.dim * 2),
+            ("ids.i64", 8),
+            ("hashes.u64", 8),
+        ):
+            with open(self.directory / name, "r+b") as f:
+                f.truncate(capacity * row_bytes)
+        
+        self.capacity = capacity
+        self._open("r+")
+        self._write_meta()
+    
+    def _write_meta(self):
+        """Persist the row count atomically."""
+        tmp_path = self._meta_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({"count": self.count, "capacity": self.capacity, "dim": self.dim}, f)
+        os.replace(tmp_path, self._meta_path)
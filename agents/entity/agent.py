@@ -1,20 +1,62 @@
 import spacy
 import json
 import os
+import copy
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict
 from pathlib import Path
 
+from agents.models import SPACY_NER_ONLY, get_spacy_model, spacy_on_gpu
+from agents.entity.matcher import KeywordMatcher
+
+try:
+    from blake3 import blake3 as _text_hasher
+except ImportError:
+    _text_hasher = hashlib.sha256
+
+try:
+    import orjson as _json
+except ImportError:
+    _json = json
+
+
+ENTITY_KEYS = ("companies", "persons", "locations", "money", "dates", "regulators", "sectors", "events")
+
+# Entity type -> (impact type, confidence) used by map_to_stocks
+STOCK_MATCH_TYPES = (
+    ("companies", "direct", 1.0),
+    ("regulators", "regulator", 0.8),  # Regulator actions affect market broadly
+    ("sectors", "sector", 0.6)
+)
+
 
 class EntityAgent:
-    def __init__(self, model_name="en_core_web_sm", stock_map_path=None):
+    def __init__(self, model_name="en_core_web_sm", stock_map_path=None, cache_size=10_000, n_process=1):
         """
         Initialize the EntityAgent with spaCy NER and stock mapping.
         
         Args:
             model_name: spaCy model to use for NER
             stock_map_path: Path to stock symbol mapping JSON file
+            cache_size: Maximum number of texts kept in the entity LRU cache
+            n_process: Worker processes for large nlp.pipe batches; batch
+                scripts may raise it, the API keeps the default of 1
+                since forking a server with torch loaded is unsafe
+                (always 1 on GPU)
         """
+        # Larger batches pay off when spaCy runs on GPU (enabled at startup
+        # with agents.models.prefer_spacy_gpu)
+        self.use_gpu = spacy_on_gpu()
+        self.batch_size = 256 if self.use_gpu else 64
+        
+        # GPU state is not fork-safe, so multiprocessing is CPU only
+        self.n_process = 1 if self.use_gpu else n_process
+        self.min_parallel_batch = 32
+        
         try:
-            self.nlp = spacy.load(model_name)
+            # Only doc.ents is consumed, so keep NER and drop the rest of the pipeline
+            self.nlp = get_spacy_model(model_name, disable=SPACY_NER_ONLY)
         except OSError:
             raise Exception(
                 f"spaCy model '{model_name}' not found. "
@@ -29,8 +71,16 @@ class EntityAgent:
         
         self.stock_map = {}
         if os.path.exists(stock_map_path):
-            with open(stock_map_path, 'r') as f:
-                self.stock_map = json.load(f)
+            self.stock_map = _json.loads(Path(stock_map_path).read_bytes())
+        
+        # Case-insensitive lookup: spaCy spans rarely match the map's casing.
+        # Sector names also reach "<name> Sector" entries, but only through
+        # the sector lookup, so an ORG span like "Banking" is not a direct hit
+        self._lookup = {name.casefold(): symbol for name, symbol in self.stock_map.items()}
+        self._sector_lookup = dict(self._lookup)
+        for name, symbol in self._lookup.items():
+            if name.endswith(" sector"):
+                self._sector_lookup.setdefault(name[:-len(" sector")], symbol)
         
         # Financial entity classification rules
         self.regulators = {"RBI", "SEBI", "Reserve Bank of India", "Securities and Exchange Board"}
@@ -62,6 +112,24 @@ class EntityAgent:
             "lupin": "Pharma",
             "divi": "Pharma"
         }
+        
+        # Syndicated stories repeat across feeds: cache entities by text hash
+        self.cache_size = cache_size
+        self._ent_cache = OrderedDict()
+        self._ent_cache_lock = threading.Lock()
+        
+        # Case-folded lookup keys, computed once instead of per article
+        self._regulators_lc = frozenset(reg.casefold() for reg in self.regulators)
+        self._sectors_lc = tuple(sector.casefold() for sector in self.sectors)
+        self._event_keywords_lc = tuple(event.casefold() for event in self.event_keywords)
+        
+        # One automaton over every keyword list, tagged by kind
+        self.matcher = KeywordMatcher(
+            [("regulator", reg, reg) for reg in self._regulators_lc]
+            + [("sector", sector, sector.title()) for sector in self._sectors_lc]
+            + [("event", event, event.title()) for event in self._event_keywords_lc]
+            + [("company_sector", keyword, sector) for keyword, sector in self.company_sectors.items()]
+        )
     
     def extract_entities(self, text):
         """
@@ -70,60 +138,97 @@ class EntityAgent:
         Returns:
             dict with entity types and their values
         """
-        doc = self.nlp(text)
-        
-        entities = {
-            "companies": [],
-            "persons": [],
-            "locations": [],
-            "money": [],
-            "dates": [],
-            "regulators": [],
-            "sectors": [],
-            "events": []
-        }
+        key = self._cache_key(text)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return self._complete(cached)
+        
+        entities = self._entities_from_doc(self.nlp(text), text.casefold())
+        self._cache_put(key, entities)
+        return self._complete(copy.deepcopy(entities))
+    
+    @staticmethod
+    def _complete(entities):
+        """Fill in an empty list for every entity type missing from a compact dict."""
+        return {key: entities.get(key, []) for key in ENTITY_KEYS}
+    
+    def _cache_key(self, text):
+        """Short digest of the text used as the cache key."""
+        return _text_hasher(text.encode("utf-8")).digest()[:16]
+    
+    def _cache_get(self, key):
+        """Return a copy of the cached entities for key, or None."""
+        with self._ent_cache_lock:
+            entities = self._ent_cache.get(key)
+            if entities is None:
+                return None
+            self._ent_cache.move_to_end(key)
+        
+        return copy.deepcopy(entities)
+    
+    def _cache_put(self, key, entities):
+        """Store entities for key, evicting the least recently used entry."""
+        with self._ent_cache_lock:
+            self._ent_cache[key] = entities
+            self._ent_cache.move_to_end(key)
+            
+            while len(self._ent_cache) > self.cache_size:
+                self._ent_cache.popitem(last=False)
+    
+    def _entities_from_doc(self, doc, text_lower):
+        """
+        Build the entity dict from an already parsed spaCy doc.
+        
+        Args:
+            doc: spaCy Doc for the article text
+            text_lower: Case-folded article text
+        
+        Returns:
+            dict with the entity types that were found and their values
+        """
+        # Sets deduplicate as entities are found; types without any entity
+        # never get an entry
+        entities = defaultdict(set)
         
         # Extract standard NER entities
         for ent in doc.ents:
             if ent.label_ == "ORG":
-                # Check if it's a regulator
-                if any(reg.lower() in ent.text.lower() for reg in self.regulators):
-                    entities["regulators"].append(ent.text)
+                # One scan of the span classifies it as regulator or company
+                # and finds the company's sector keyword
+                ent_lower = ent.text.casefold()
+                hits = self.matcher.matches(ent_lower)
+                
+                if any(kind == "regulator" for kind, _, _ in hits):
+                    entities["regulators"].add(ent.text)
                 else:
-                    entities["companies"].append(ent.text)
+                    entities["companies"].add(ent.text)
+                    
+                    # Infer sector from company name (first keyword in
+                    # company_sectors order wins)
+                    company_hits = [
+                        (priority, value)
+                        for kind, value, priority in hits
+                        if kind == "company_sector"
+                    ]
+                    if company_hits:
+                        entities["sectors"].add(min(company_hits)[1])
             elif ent.label_ == "PERSON":
-                entities["persons"].append(ent.text)
+                entities["persons"].add(ent.text)
             elif ent.label_ == "GPE":
-                entities["locations"].append(ent.text)
+                entities["locations"].add(ent.text)
             elif ent.label_ == "MONEY":
-                entities["money"].append(ent.text)
+                entities["money"].add(ent.text)
             elif ent.label_ == "DATE":
-                entities["dates"].append(ent.text)
-        
-        # Extract sector mentions
-        text_lower = text.lower()
-        for sector in self.sectors:
-            if sector in text_lower:
-                entities["sectors"].append(sector.title())
-        
-        # Infer sectors from company names
-        for company in entities["companies"]:
-            company_lower = company.lower()
-            for keyword, sector in self.company_sectors.items():
-                if keyword in company_lower:
-                    entities["sectors"].append(sector)
-                    break  # Only add one sector per company
-        
-        # Extract event keywords
-        for event in self.event_keywords:
-            if event.lower() in text_lower:
-                entities["events"].append(event.title())
-        
-        # Deduplicate lists
-        for key in entities:
-            entities[key] = list(set(entities[key]))
-        
-        return entities
+                entities["dates"].add(ent.text)
+        
+        # Extract sector and event mentions in a single scan
+        for kind, value, _ in self.matcher.matches(text_lower):
+            if kind == "sector":
+                entities["sectors"].add(value)
+            elif kind == "event":
+                entities["events"].add(value)
+        
+        return {key: list(values) for key, values in entities.items() if values}
     
     def map_to_stocks(self, entities):
         """
@@ -134,63 +239,75 @@ class EntityAgent:
         """
         impacted_stocks = []
         
-        # Direct company mentions
-        for company in entities["companies"]:
-            if company in self.stock_map:
-                impacted_stocks.append({
-                    "symbol": self.stock_map[company],
-                    "confidence": 1.0,
-                    "type": "direct",
-                    "entity": company
-                })
-        
-        # Regulator actions (affects market broadly)
-        for regulator in entities["regulators"]:
-            if regulator in self.stock_map:
-                impacted_stocks.append({
-                    "symbol": self.stock_map[regulator],
-                    "confidence": 0.8,
-                    "type": "regulator",
-                    "entity": regulator
-                })
-        
-        # Sector mentions (lower confidence)
-        for sector in entities["sectors"]:
-            sector_key = f"{sector} Sector"
-            if sector_key in self.stock_map:
-                impacted_stocks.append({
-                    "symbol": self.stock_map[sector_key],
-                    "confidence": 0.6,
-                    "type": "sector",
-                    "entity": sector
-                })
+        # Direct company mentions, then regulators, then sectors (lower confidence)
+        for key, match_type, confidence in STOCK_MATCH_TYPES:
+            lookup = self._sector_lookup if key == "sectors" else self._lookup
+            for name in entities.get(key, ()):
+                symbol = lookup.get(name.casefold())
+                if symbol:
+                    impacted_stocks.append({
+                        "symbol": symbol,
+                        "confidence": confidence,
+                        "type": match_type,
+                        "entity": name
+                    })
         
         return impacted_stocks
     
-    def run(self, articles):
+    def run(self, articles, in_place=False, compact=False):
         """
         Enrich articles with extracted entities and stock mappings.
         
         Args:
             articles: List of dicts with 'id' and 'text' keys
+            in_place: Add the results to the given article dicts instead of
+                returning copies
+            compact: Omit entity types with no entities instead of storing
+                empty lists
             
         Returns:
             List of enriched articles with entities and impacted_stocks
         """
-        enriched_articles = []
+        enriched_articles = articles if in_place else []
+        
+        # Only texts missing from the cache go through spaCy
+        keys = [self._cache_key(article["text"]) for article in articles]
+        pending = {}
+        with self._ent_cache_lock:
+            for key, article in zip(keys, articles):
+                if key not in self._ent_cache and key not in pending:
+                    pending[key] = article["text"]
+        
+        # Parse all uncached texts in one batched spaCy call, across worker
+        # processes once the batch is large enough to amortise their startup
+        n_process = self.n_process if len(pending) >= self.min_parallel_batch else 1
+        
+        # Batches are the unit of work per process, so keep every worker busy
+        batch_size = max(1, min(self.batch_size, len(pending) // n_process))
+        docs = self.nlp.pipe(
+            list(pending.values()),
+            batch_size=batch_size,
+            n_process=n_process
+        )
+        for (key, text), doc in zip(pending.items(), docs):
+            self._cache_put(key, self._entities_from_doc(doc, text.casefold()))
         
-        for article in articles:
-            # Create a copy to avoid mutating original
-            enriched = article.copy()
+        for key, article in zip(keys, articles):
+            # Copy unless the caller lets us mutate the original
+            enriched = article if in_place else article.copy()
             
             # Extract entities
-            entities = self.extract_entities(article["text"])
-            enriched["entities"] = entities
+            entities = self._cache_get(key)
+            if entities is None:
+                # Evicted within this batch (more unique texts than cache_size)
+                entities = self._entities_from_doc(self.nlp(article["text"]), article["text"].casefold())
+            enriched["entities"] = entities if compact else self._complete(entities)
             
             # Map to stock symbols
             impacted_stocks = self.map_to_stocks(entities)
             enriched["impacted_stocks"] = impacted_stocks
             
-            enriched_articles.append(enriched)
+            if not in_place:
+                enriched_articles.append(enriched)
         
         return enriched_articles
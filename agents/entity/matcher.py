@@ -0,0 +1,128 @@
+"""
+Keyword Matcher
+
+Multi-pattern keyword search for financial entity classification.
+All keywords are compiled into a single Aho-Corasick automaton so a text is
+scanned once regardless of how many keywords are registered. Hits are only
+kept on word boundaries, so "auto" does not match inside "autos".
+
+When Intel Hyperscan (python-hyperscan) is installed, the keywords are
+compiled into a Hyperscan database instead, which scans with SIMD and
+checks the word boundaries inside the engine. It is an optional extra
+(x86-64 only, listed commented out in requirements.txt): default installs
+use the Aho-Corasick automaton.
+"""
+
+import re
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+import ahocorasick
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+
+def _is_word_char(char: str) -> bool:
+    """Same notion of a word character as the regex \\w class."""
+    return char.isalnum() or char == "_"
+
+
+class KeywordMatcher:
+    """Single-pass matcher over lowercased keywords tagged with a kind."""
+    
+    def __init__(
+        self,
+        keywords: Iterable[Tuple[str, str, str]],
+        whole_words: bool = True,
+        use_hyperscan: bool = True
+    ):
+        """
+        Build the automaton.
+        
+        Args:
+            keywords: (kind, keyword, value) triples. Keywords are matched
+                case-insensitively; priority follows registration order.
+            whole_words: Drop hits that start or end inside a word
+            use_hyperscan: Use Hyperscan when it is installed. Its word
+                boundaries are ASCII-only, unlike the automaton's.
+        """
+        self.whole_words = whole_words
+        entries: Dict[str, List[Tuple[str, str, int]]] = {}
+        
+        for priority, (kind, keyword, value) in enumerate(keywords):
+            entries.setdefault(keyword.casefold(), []).append((kind, value, priority))
+        
+        self._hs_db = None
+        if use_hyperscan and hyperscan is not None and entries:
+            self._build_hyperscan(entries)
+            return
+        
+        self._automaton = ahocorasick.Automaton()
+        for keyword, tagged in entries.items():
+            self._automaton.add_word(keyword, (len(keyword), tagged))
+        
+        self._automaton.make_automaton()
+    
+    def _build_hyperscan(self, entries: Dict[str, List[Tuple[str, str, int]]]):
+        """Compile every keyword into one Hyperscan block-mode database."""
+        boundary = r"\b" if self.whole_words else ""
+        expressions = [
+            f"{boundary}{re.escape(keyword)}{boundary}".encode("utf-8")
+            for keyword in entries
+        ]
+        
+        self._hs_tagged = list(entries.values())
+        self._hs_db = hyperscan.Database()
+        self._hs_db.compile(
+            expressions=expressions,
+            ids=list(range(len(expressions))),
+            elements=len(expressions),
+            flags=[hyperscan.HS_FLAG_UTF8] * len(expressions)
+        )
+        
+        # Scratch space is not safe to share between concurrent scans
+        self._hs_local = threading.local()
+    
+    def matches(self, text_lower: str) -> List[Tuple[str, str, int]]:
+        """
+        Find every keyword occurrence in a case-folded text.
+        
+        Args:
+            text_lower: Case-folded text to scan
+        
+        Returns:
+            List of (kind, value, priority) tuples, one per occurrence
+        """
+        if self._hs_db is not None:
+            return self._hyperscan_matches(text_lower)
+        
+        hits = []
+        for end, (length, tagged) in self._automaton.iter(text_lower):
+            if self.whole_words and not self._on_word_boundary(text_lower, end - length + 1, end):
+                continue
+            hits.extend(tagged)
+        return hits
+    
+    def _hyperscan_matches(self, text_lower: str) -> List[Tuple[str, str, int]]:
+        """Hyperscan version of matches(); boundaries are checked by the engine."""
+        scratch = getattr(self._hs_local, "scratch", None)
+        if scratch is None:
+            scratch = self._hs_local.scratch = hyperscan.Scratch(self._hs_db)
+        
+        hits = []
+        
+        def on_match(pattern_id, start, end, flags, context):
+            hits.extend(self._hs_tagged[pattern_id])
+        
+        self._hs_db.scan(text_lower.encode("utf-8"), match_event_handler=on_match, scratch=scratch)
+        return hits
+    
+    @staticmethod
+    def _on_word_boundary(text: str, start: int, end: int) -> bool:
+        """Whether text[start:end + 1] is not joined to a neighbouring word character."""
+        before = text[start - 1] if start > 0 else " "
+        after = text[end + 1] if end + 1 < len(text) else " "
+        return not _is_word_char(before) and not _is_word_char(after)
@@ -1,34 +1,249 @@
 import google.generativeai as genai
 from google.generativeai import GenerativeModel
+from google.generativeai.types import AsyncGenerateContentResponse, GenerateContentResponse
 import os
 import json
 import time
-from typing import Dict, Any, List
+import random
+import asyncio
+import functools
+import hashlib
+import itertools
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 
 # Import usage tracking, rate limiting, and safety
 from agents.llm.usage import usage_tracker
-from agents.llm.limiter import rate_limiter, LLMRateLimitError
+from agents.llm.limiter import RateLimiter, rate_limiter, LLMRateLimitError
 from agents.llm.safety import safety_guard, SafetyViolationError
+from agents.llm.cache import SemanticCache
+
+try:
+    import orjson as _json
+except ImportError:
+    _json = json
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    from google.api_core.exceptions import ResourceExhausted
+except ImportError:
+    ResourceExhausted = None
+
+# Errors retried with backoff: our own limiter, and HTTP 429 from the API
+_RATE_LIMIT_ERRORS = (LLMRateLimitError,) + ((ResourceExhausted,) if ResourceExhausted else ())
+
+# Markdown code fence around JSON responses (```json ... ```)
+_FENCE_RE = re.compile(r"^```(?:json)?\s*([\s\S]*?)\s*(?:```\s*)?$")
+
+
+def _strip_fence(text: str) -> str:
+    """Body of a code-fenced response, or text unchanged if it is not fenced."""
+    match = _FENCE_RE.match(text)
+    return match.group(1) if match else text
+
+
+if msgspec is not None:
+    class RegulationResult(msgspec.Struct):
+        """Schema of interpret_regulation responses."""
+        impact: str
+        affected_sectors: List[str]
+        risk_level: str
+        explanation: str
+    
+    # Decodes and validates in one pass, without an intermediate dict;
+    # msgspec is in the requirements, the orjson path below is the fallback
+    _regulation_decoder = msgspec.json.Decoder(RegulationResult)
+else:
+    _regulation_decoder = None
+
+
+def _parse_regulation(response_text: str) -> Dict[str, Any]:
+    """
+    Decode and validate a regulatory interpretation response.
+    
+    Args:
+        response_text: JSON object text, without code fences
+    
+    Returns:
+        Dict with impact, affected_sectors, risk_level, and explanation
+    
+    Raises:
+        json.JSONDecodeError: If the text is not valid JSON
+        ValueError: If required fields are missing or mistyped
+    """
+    data = response_text.encode("utf-8")
+    
+    if _regulation_decoder is not None:
+        try:
+            return msgspec.structs.asdict(_regulation_decoder.decode(data))
+        except msgspec.ValidationError as e:
+            raise ValueError(f"Invalid response structure: {e}")
+        except msgspec.DecodeError as e:
+            raise json.JSONDecodeError(str(e), response_text, 0)
+    
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError
+    result = _json.loads(data)
+    
+    # Validate required fields
+    required_fields = ["impact", "affected_sectors", "risk_level", "explanation"]
+    if not all(field in result for field in required_fields):
+        raise ValueError("Missing required fields in response")
+    
+    return result
+
+
+@functools.lru_cache(maxsize=1)
+def _token_encoding():
+    """tiktoken cl100k_base encoding, or None if tiktoken or its BPE file is unavailable."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+class KeyedModel:
+    """
+    Gemini model bound to its own API key.
+    
+    GenerativeModel always authenticates with the key given to
+    genai.configure, so extra pool keys call the public generativelanguage
+    clients directly. Responses are wrapped in the same response types
+    GenerativeModel returns.
+    """
+    
+    def __init__(self, model_name: str, api_key: str, transport: str):
+        from google.ai import generativelanguage as glm
+        
+        self._glm = glm
+        self.model_name = f"models/{model_name}"
+        self._client_options = {"api_key": api_key}
+        self._client = glm.GenerativeServiceClient(transport=transport, client_options=self._client_options)
+        
+        # grpc.aio clients bind to the loop they are created on
+        self._async_client = None
+    
+    def _request(self, prompt: str):
+        """GenerateContentRequest for a single-turn text prompt."""
+        glm = self._glm
+        return glm.GenerateContentRequest(
+            model=self.model_name,
+            contents=[glm.Content(role="user", parts=[glm.Part(text=prompt)])]
+        )
+    
+    def generate_content(self, prompt: str, stream: bool = False):
+        """Same as GenerativeModel.generate_content for a text prompt."""
+        request = self._request(prompt)
+        if stream:
+            return GenerateContentResponse.from_iterator(self._client.stream_generate_content(request))
+        return GenerateContentResponse.from_response(self._client.generate_content(request))
+    
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        """Same as GenerativeModel.generate_content_async for a text prompt."""
+        if self._async_client is None:
+            self._async_client = self._glm.GenerativeServiceAsyncClient(client_options=self._client_options)
+        
+        request = self._request(prompt)
+        if stream:
+            iterator = await self._async_client.stream_generate_content(request)
+            return await AsyncGenerateContentResponse.from_aiterator(iterator)
+        return GenerateContentResponse.from_response(await self._async_client.generate_content(request))
 
 
 class LLMAgent:
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, max_concurrency: int = None, transport: str = None, prewarm: bool = True, semantic_cache: bool = None, batch_size: int = None, stream: bool = True, api_keys: List[str] = None):
         """
         Initialize the LLMAgent with Google Gemini 2.5 Flash.
         
         Args:
             api_key: Gemini API key (defaults to GEMINI_API_KEY env var)
+            max_concurrency: Maximum in-flight requests for run_async
+                (defaults to LLM_CONCURRENCY env var, or 16)
+            transport: Gemini client transport (defaults to GEMINI_TRANSPORT
+                env var, or "grpc")
+            prewarm: Open the connection in the background so the first
+                call does not pay for the TCP/TLS handshake
+            semantic_cache: Reuse responses for near-identical inputs
+                (defaults to LLM_SEMANTIC_CACHE env var, enabled unless "0")
+            batch_size: Articles summarized per request by run/run_async
+                (defaults to LLM_BATCH_SIZE env var, or 8; 1 disables batching)
+            stream: Stream responses and stop generating at the first
+                banned phrase sanitize would reject, instead of paying
+                for the full response
+            api_keys: Pool of Gemini API keys, each with its own rate limit
+                (defaults to comma-separated GEMINI_API_KEYS env var, or
+                just api_key)
         """
         # Configure Gemini API
-        api_key = api_key or os.getenv("GEMINI_API_KEY")
+        if api_keys is None:
+            api_keys = [k.strip() for k in os.getenv("GEMINI_API_KEYS", "").split(",") if k.strip()]
+        api_key = api_key or (api_keys[0] if api_keys else os.getenv("GEMINI_API_KEY"))
         if not api_key:
             raise ValueError(
                 "GEMINI_API_KEY not found. Please set it as an environment variable "
                 "or pass it to the constructor."
             )
         
-        genai.configure(api_key=api_key)
+        # gRPC keeps one long-lived HTTP/2 channel per process that every
+        # call (and every LLMAgent) multiplexes over, instead of a new
+        # connection per request
+        self.transport = transport or os.getenv("GEMINI_TRANSPORT", "grpc")
+        genai.configure(api_key=api_key, transport=self.transport)
         self.model = GenerativeModel("gemini-2.5-flash")
+        self.stream = stream
+        
+        # Key pool: the configured key goes through the global limiter,
+        # every extra key through its own, so K keys allow K times the
+        # calls per minute
+        self._pool = [(self.model, rate_limiter)]
+        for key in dict.fromkeys(api_keys):
+            if key != api_key:
+                self._pool.append((
+                    self._keyed_model(key),
+                    RateLimiter(
+                        max_calls_per_minute=rate_limiter.max_calls_per_minute,
+                        max_tokens_per_call=rate_limiter.max_tokens_per_call,
+                        max_calls_per_request=rate_limiter.max_calls_per_request
+                    )
+                ))
+        self._pool_turn = itertools.count()
+        
+        if prewarm:
+            threading.Thread(target=self._warm_up, name="gemini-warmup", daemon=True).start()
+        
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_CONCURRENCY", "16"))
+        
+        # Several articles per request amortize the round trip; long texts
+        # are truncated so a batch stays within a reasonable prompt size
+        self.batch_size = max(1, batch_size or int(os.getenv("LLM_BATCH_SIZE", "8")))
+        self.batch_text_chars = 2000
+        
+        # Sanitizing a long response (a whole batch) runs on worker threads
+        # so the event loop keeps dispatching requests; short ones stay
+        # inline, where the thread hop would cost more than the work
+        self.offload_chars = 16_384
+        self._sanitize_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm-sanitize")
+        
+        # run() from sync code drives run_async on one long-lived loop: the
+        # async gRPC client is bound to the loop it was first used on
+        self._sync_loop = None
+        self._sync_loop_lock = threading.Lock()
+        
+        if semantic_cache is None:
+            semantic_cache = os.getenv("LLM_SEMANTIC_CACHE", "1") != "0"
+        self.semantic_cache = SemanticCache() if semantic_cache else None
+        
+        # Identical prompts (pipeline reruns, duplicated articles) skip the LLM
+        self.exact_cache_size = 10_000
+        self._exact_cache = OrderedDict()
+        self._exact_lock = threading.Lock()
         
         # System prompts for different tasks
         self.query_expansion_prompt = """Expand this financial query into a detailed, richer form without changing user intent. 
@@ -39,6 +254,11 @@ Output only the expanded query text without any additional formatting or explana
 Focus on stock impact, regulatory moves, risks, opportunities, and sentiment.
 Be concise, accurate, and trader-centric."""
         
+        self.batch_summarization_prompt = """Summarize each of the following financial news articles in 2 sentences for a trader.
+Focus on stock impact, regulatory moves, risks, opportunities, and sentiment.
+Be concise, accurate, and trader-centric.
+Return only a JSON array with one {"id": ..., "summary": "..."} object per article, using the given ids."""
+        
         self.regulation_prompt = """Explain the regulatory impact of this financial update.
 List affected sectors and expected market reaction.
 Return your response in JSON format with the following structure:
@@ -48,8 +268,143 @@ Return your response in JSON format with the following structure:
   "risk_level": "Low/Medium/High",
   "explanation": "detailed explanation"
 }"""
+        
+        # Fixed prompt prefixes and their token estimates, computed once
+        self._qe_prefix = self.query_expansion_prompt + "\n\nQuery: "
+        self._sum_prefix = self.summarization_prompt + "\n\nArticle: "
+        self._reg_prefix = self.regulation_prompt + "\n\nRegulatory Update: "
+        self._batch_prefix = self.batch_summarization_prompt + "\n\nArticles: "
+        self._qe_prefix_tokens = self._estimate_tokens(self._qe_prefix)
+        self._sum_prefix_tokens = self._estimate_tokens(self._sum_prefix)
+        self._reg_prefix_tokens = self._estimate_tokens(self._reg_prefix)
+        self._batch_prefix_tokens = self._estimate_tokens(self._batch_prefix)
+    
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """
+        Token count from tiktoken's cl100k_base BPE (a close proxy for
+        Gemini's tokenizer), falling back to 1 token ≈ 4 chars.
+        """
+        encoding = _token_encoding()
+        if encoding is None:
+            return len(text) // 4
+        return len(encoding.encode(text, disallowed_special=()))
+    
+    def _input_tokens(self, prompt: str, cache_text: Optional[str], prefix_tokens: Optional[int]) -> int:
+        """Input token estimate, reusing the precomputed count of a fixed prefix."""
+        if prefix_tokens is not None and cache_text is not None:
+            return prefix_tokens + self._estimate_tokens(cache_text)
+        return self._estimate_tokens(prompt)
+    
+    def _keyed_model(self, api_key: str) -> KeyedModel:
+        """Model whose requests authenticate with api_key instead of the configured key."""
+        return KeyedModel("gemini-2.5-flash", api_key, self.transport)
     
-    def _safe_generate(self, prompt: str, max_retries: int = 3, sources: List[str] = None) -> str:
+    def _acquire_model(self):
+        """
+        Reserve a call on the next key in the pool that has budget left.
+        
+        Returns:
+            Model bound to the reserved key
+        
+        Raises:
+            LLMRateLimitError: If every key is at its rate limit
+        """
+        start = next(self._pool_turn)
+        error = None
+        for offset in range(len(self._pool)):
+            model, limiter = self._pool[(start + offset) % len(self._pool)]
+            try:
+                limiter.allow_and_register()
+                return model
+            except LLMRateLimitError as e:
+                error = e
+        raise error
+    
+    @staticmethod
+    def _backoff_delay(error: Exception, retry_count: int) -> float:
+        """
+        Jittered wait before retry number retry_count.
+        
+        A 429 from the API pushes back the shared deadline, so every worker
+        pauses rather than only the one that saw it. Each worker adds its
+        own random jitter on top, so they do not all retry at once.
+        
+        Args:
+            error: The rate limit error that was raised
+            retry_count: Retries made so far, starting at 1
+        
+        Returns:
+            Seconds to wait
+        """
+        cap = min(8.0, 2 ** retry_count)
+        if not isinstance(error, LLMRateLimitError):
+            rate_limiter.defer(cap)
+        return rate_limiter.retry_delay() + random.uniform(0.5, cap)
+    
+    @staticmethod
+    def _entry_delay() -> float:
+        """Wait before a new attempt while the shared deadline is pending (0 if none)."""
+        delay = rate_limiter.retry_delay()
+        return delay + random.uniform(0, 1) if delay else 0.0
+    
+    def _warm_up(self):
+        """Establish the client connection with a metadata call (no tokens used)."""
+        try:
+            genai.get_model(self.model.model_name)
+        except Exception:
+            # Best effort: the first real call connects instead
+            pass
+    
+    def _cache_get(self, prompt: str, cache_text: Optional[str]) -> Optional[str]:
+        """
+        Raw cached response for a prompt: exact match first, then semantic
+        match on cache_text (the variable part of the prompt).
+        """
+        key = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).digest()
+        with self._exact_lock:
+            cached = self._exact_cache.get(key)
+            if cached is not None:
+                self._exact_cache.move_to_end(key)
+        
+        if cached is None and self.semantic_cache is not None and cache_text:
+            try:
+                cached = self.semantic_cache.get(prompt[:-len(cache_text)], cache_text)
+            except Exception:
+                # Embedding model unavailable: run without the semantic cache
+                self.semantic_cache = None
+        
+        if cached is not None:
+            usage_tracker.record_cache_hit()
+        return cached
+    
+    def _cache_put(self, prompt: str, cache_text: Optional[str], response_text: str):
+        """Remember the raw response for a prompt whose variable part is cache_text."""
+        key = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).digest()
+        with self._exact_lock:
+            self._exact_cache[key] = response_text
+            self._exact_cache.move_to_end(key)
+            while len(self._exact_cache) > self.exact_cache_size:
+                self._exact_cache.popitem(last=False)
+        
+        if self.semantic_cache is None or not cache_text:
+            return
+        
+        try:
+            self.semantic_cache.put(prompt[:-len(cache_text)], cache_text, response_text)
+        except Exception:
+            self.semantic_cache = None
+    
+    def _safe_generate(
+        self,
+        prompt: str,
+        max_retries: int = 3,
+        sources: List[str] = None,
+        cache_text: str = None,
+        prefix_tokens: int = None,
+        sanitize: bool = True,
+        semantic: bool = True
+    ) -> str:
         """
         Safely generate content with rate limiting, usage tracking, and safety checks.
         
@@ -57,6 +412,14 @@ Return your response in JSON format with the following structure:
             prompt: The prompt to send to the LLM
             max_retries: Maximum number of retries on rate limit errors
             sources: Optional list of source identifiers for citations
+            cache_text: Variable tail of the prompt; enables the semantic
+                cache, keyed by the rest of the prompt (the template)
+            prefix_tokens: Precomputed token count of the prompt before
+                cache_text
+            sanitize: Apply safety_guard.sanitize; when False the raw
+                response is returned for the caller to sanitize in parts
+            semantic: Allow semantic cache matches on cache_text; when
+                False only identical prompts are served from cache
         
         Returns:
             Sanitized response text
@@ -65,46 +428,58 @@ Return your response in JSON format with the following structure:
             LLMRateLimitError: If rate limit exceeded after retries
             SafetyViolationError: If response violates safety rules
         """
+        # Cached raw responses are sanitized again with this call's sources
+        semantic_text = cache_text if semantic else None
+        cached = self._cache_get(prompt, semantic_text)
+        if cached is not None:
+            return safety_guard.sanitize(cached, sources=sources) if sanitize else cached
+        
         retry_count = 0
         last_error = None
         
         while retry_count < max_retries:
+            # Respect a pause another worker was told to take by the API
+            entry_delay = self._entry_delay()
+            if entry_delay:
+                time.sleep(entry_delay)
+            
             try:
-                # Check rate limiter
-                rate_limiter.allow_call()
+                # Check the rate limits and reserve a slot on a pool key
+                model = self._acquire_model()
                 
                 # Track start time
                 start_time = time.time()
                 
                 # Generate content
-                response = self.model.generate_content(prompt)
-                response_text = response.text.strip()
+                response_text = self._generate_text(model, prompt, scan=sanitize)
                 
                 # Calculate latency
                 latency = time.time() - start_time
                 
-                # Estimate tokens (rough approximation: 1 token ≈ 4 chars)
-                input_tokens = len(prompt) // 4
-                output_tokens = len(response_text) // 4
+                # Count tokens
+                input_tokens = self._input_tokens(prompt, cache_text, prefix_tokens)
+                output_tokens = self._estimate_tokens(response_text)
                 
                 # Record successful call
                 usage_tracker.record_call(input_tokens, output_tokens, latency)
-                rate_limiter.register_call()
                 
                 # Apply safety sanitization
-                sanitized_text = safety_guard.sanitize(response_text, sources=sources)
+                if sanitize:
+                    sanitized_text = safety_guard.sanitize(response_text, sources=sources)
+                else:
+                    sanitized_text = response_text
+                self._cache_put(prompt, semantic_text, response_text)
                 
                 return sanitized_text
             
-            except LLMRateLimitError as e:
+            except _RATE_LIMIT_ERRORS as e:
                 usage_tracker.record_failure()
                 last_error = e
                 retry_count += 1
                 
                 if retry_count < max_retries:
-                    # Exponential backoff: 1s, 2s, 4s
-                    wait_time = 2 ** (retry_count - 1)
-                    time.sleep(wait_time)
+                    # Jittered exponential backoff, capped at 8s
+                    time.sleep(self._backoff_delay(e, retry_count))
                 else:
                     raise
             
@@ -122,6 +497,177 @@ Return your response in JSON format with the following structure:
         
         raise Exception("Unexpected error in _safe_generate")
     
+    async def _safe_generate_async(
+        self,
+        prompt: str,
+        max_retries: int = 3,
+        sources: List[str] = None,
+        cache_text: str = None,
+        prefix_tokens: int = None,
+        sanitize: bool = True,
+        semantic: bool = True
+    ) -> str:
+        """
+        Async version of _safe_generate using the SDK's non-blocking client.
+        
+        Args:
+            prompt: The prompt to send to the LLM
+            max_retries: Maximum number of retries on rate limit errors
+            sources: Optional list of source identifiers for citations
+            cache_text: Variable tail of the prompt (see _safe_generate)
+            prefix_tokens: Precomputed token count of the prompt before
+                cache_text
+            sanitize: Apply safety_guard.sanitize; when False the raw
+                response is returned for the caller to sanitize in parts
+            semantic: Allow semantic cache matches on cache_text; when
+                False only identical prompts are served from cache
+        
+        Returns:
+            Sanitized response text
+        
+        Raises:
+            LLMRateLimitError: If rate limit exceeded after retries
+            SafetyViolationError: If response violates safety rules
+        """
+        semantic_text = cache_text if semantic else None
+        # A semantic lookup encodes semantic_text (loading the model on
+        # first use), so it runs off the event loop
+        if self.semantic_cache is not None and semantic_text:
+            cached = await asyncio.to_thread(self._cache_get, prompt, semantic_text)
+        else:
+            cached = self._cache_get(prompt, semantic_text)
+        if cached is not None:
+            return await self._sanitize_async(cached, sources) if sanitize else cached
+        
+        retry_count = 0
+        
+        while True:
+            entry_delay = self._entry_delay()
+            if entry_delay:
+                await asyncio.sleep(entry_delay)
+            
+            try:
+                # Check the rate limits and reserve a slot on a pool key
+                model = self._acquire_model()
+                
+                # Track start time
+                start_time = time.time()
+                
+                # Generate content without blocking the event loop
+                response_text = await self._generate_text_async(model, prompt, scan=sanitize)
+                
+                # Calculate latency
+                latency = time.time() - start_time
+                
+                # Count tokens
+                input_tokens = self._input_tokens(prompt, cache_text, prefix_tokens)
+                output_tokens = self._estimate_tokens(response_text)
+                
+                # Record successful call
+                usage_tracker.record_call(input_tokens, output_tokens, latency)
+                
+                # Apply safety sanitization
+                if sanitize:
+                    sanitized_text = await self._sanitize_async(response_text, sources)
+                else:
+                    sanitized_text = response_text
+                if self.semantic_cache is not None and semantic_text:
+                    await asyncio.to_thread(self._cache_put, prompt, semantic_text, response_text)
+                else:
+                    self._cache_put(prompt, semantic_text, response_text)
+                
+                return sanitized_text
+            
+            except _RATE_LIMIT_ERRORS as e:
+                usage_tracker.record_failure()
+                retry_count += 1
+                
+                if retry_count >= max_retries:
+                    raise
+                
+                # Jittered exponential backoff, capped at 8s
+                await asyncio.sleep(self._backoff_delay(e, retry_count))
+            
+            except Exception:
+                usage_tracker.record_failure()
+                raise
+    
+    @staticmethod
+    def _response_text(response) -> str:
+        """
+        Text of a response or stream chunk.
+        
+        Reads the part directly when there is exactly one, the usual case,
+        instead of going through response.text, which joins the parts into
+        a new string. Anything else (several parts, a blocked response
+        with none) goes through response.text and its error reporting.
+        """
+        try:
+            parts = response.candidates[0].content.parts
+        except (AttributeError, IndexError):
+            return response.text
+        
+        if len(parts) == 1:
+            return parts[0].text
+        return response.text
+    
+    def _generate_text(self, model: GenerativeModel, prompt: str, scan: bool) -> str:
+        """
+        Response text for a prompt, streamed when enabled.
+        
+        Args:
+            model: Pool model to call
+            prompt: The prompt to send to the LLM
+            scan: Check streamed chunks for banned phrases as they arrive
+        
+        Returns:
+            Stripped response text
+        
+        Raises:
+            SafetyViolationError: If a banned phrase arrives mid-stream
+        """
+        if not self.stream:
+            return self._response_text(model.generate_content(prompt)).strip()
+        
+        scanner = safety_guard.stream_scanner() if scan else None
+        parts = []
+        for chunk in model.generate_content(prompt, stream=True):
+            text = self._response_text(chunk)
+            parts.append(text)
+            if scanner is not None:
+                # Raising here abandons the stream, ending generation early
+                scanner.feed(text)
+        
+        return "".join(parts).strip()
+    
+    async def _generate_text_async(self, model: GenerativeModel, prompt: str, scan: bool) -> str:
+        """Async version of _generate_text."""
+        if not self.stream:
+            response = await model.generate_content_async(prompt)
+            return self._response_text(response).strip()
+        
+        scanner = safety_guard.stream_scanner() if scan else None
+        parts = []
+        async for chunk in await model.generate_content_async(prompt, stream=True):
+            text = self._response_text(chunk)
+            parts.append(text)
+            if scanner is not None:
+                scanner.feed(text)
+        
+        return "".join(parts).strip()
+    
+    async def _off_loop(self, size: int, func, *args):
+        """Run CPU-bound func on the sanitize executor when size is large, else inline."""
+        if size < self.offload_chars:
+            return func(*args)
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._sanitize_executor, functools.partial(func, *args))
+    
+    async def _sanitize_async(self, text: str, sources: Optional[List[str]]) -> str:
+        """safety_guard.sanitize that keeps long responses off the event loop."""
+        return await self._off_loop(len(text), safety_guard.sanitize, text, sources)
+    
     def expand_query(self, query_dict: Dict[str, str]) -> Dict[str, str]:
         """
         Expand a financial query to improve search relevance.
@@ -139,8 +685,12 @@ Return your response in JSON format with the following structure:
         
         try:
             # Generate expanded query using safe wrapper
-            prompt = f"{self.query_expansion_prompt}\n\nQuery: {original_query}"
-            expanded_query = self._safe_generate(prompt)
+            prompt = self._qe_prefix + original_query
+            expanded_query = self._safe_generate(
+                prompt,
+                cache_text=original_query,
+                prefix_tokens=self._qe_prefix_tokens
+            )
             
             return {
                 "original": original_query,
@@ -186,9 +736,14 @@ Return your response in JSON format with the following structure:
         
         try:
             # Generate summary using safe wrapper
-            prompt = f"{self.summarization_prompt}\n\nArticle: {text}"
+            prompt = self._sum_prefix + text
             sources = [f"Article ID: {article_id}"]
-            summary = self._safe_generate(prompt, sources=sources)
+            summary = self._safe_generate(
+                prompt,
+                sources=sources,
+                cache_text=text,
+                prefix_tokens=self._sum_prefix_tokens
+            )
             
             return {
                 "id": article_id,
@@ -196,19 +751,195 @@ Return your response in JSON format with the following structure:
                 "sentiment": sentiment
             }
         
-        except (LLMRateLimitError, SafetyViolationError) as e:
+        except Exception as e:
+            return self._summary_error(article, e)
+    
+    async def summarize_article_async(self, article: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async version of summarize_article.
+        
+        Args:
+            article: Article dict with "id", "text", and optionally "sentiment"
+        
+        Returns:
+            Dict with "id", "summary", and "sentiment" keys
+        """
+        article_id = article.get("id")
+        text = article.get("text", "")
+        sentiment = article.get("sentiment", {})
+        
+        if not text:
             return {
                 "id": article_id,
-                "summary": f"Unable to generate summary: {str(e)}",
+                "summary": "No text available for summarization.",
                 "sentiment": sentiment
             }
         
-        except Exception as e:
+        try:
+            prompt = self._sum_prefix + text
+            sources = [f"Article ID: {article_id}"]
+            summary = await self._safe_generate_async(
+                prompt,
+                sources=sources,
+                cache_text=text,
+                prefix_tokens=self._sum_prefix_tokens
+            )
+            
             return {
                 "id": article_id,
-                "summary": f"Error generating summary: {str(e)}",
+                "summary": summary,
                 "sentiment": sentiment
             }
+        
+        except Exception as e:
+            return self._summary_error(article, e)
+    
+    def _summary_error(self, article: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        """Summary result reported in place of a failed summarization."""
+        if isinstance(error, (LLMRateLimitError, SafetyViolationError)):
+            summary = f"Unable to generate summary: {str(error)}"
+        else:
+            summary = f"Error generating summary: {str(error)}"
+        
+        return {
+            "id": article.get("id"),
+            "summary": summary,
+            "sentiment": article.get("sentiment", {})
+        }
+    
+    def _batch_prompt(self, batch: List[Dict[str, Any]]) -> Tuple[str, str]:
+        """
+        Single prompt asking for a JSON array of summaries of batch.
+        
+        Returns:
+            Tuple of (prompt, JSON payload after the fixed prefix)
+        """
+        payload = _json.dumps([
+            {"id": article.get("id"), "text": article.get("text", "")[:self.batch_text_chars]}
+            for article in batch
+        ])
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8")
+        return self._batch_prefix + payload, payload
+    
+    def _parse_batch(self, response_text: str, batch: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Map a batch response back to its articles.
+        
+        Args:
+            response_text: Raw JSON array response
+            batch: Articles the prompt was built from
+        
+        Returns:
+            Summary result per article, or None where the response has no
+            usable summary for it
+        """
+        response_text = _strip_fence(response_text)
+        
+        try:
+            items = _json.loads(response_text.encode("utf-8"))
+        except json.JSONDecodeError:
+            return [None] * len(batch)
+        
+        summaries = {}
+        if isinstance(items, list):
+            for item in items:
+                if isinstance(item, dict) and isinstance(item.get("summary"), str):
+                    summaries[str(item.get("id"))] = item["summary"]
+        
+        results = []
+        for article in batch:
+            article_id = article.get("id")
+            summary = summaries.get(str(article_id))
+            if not summary:
+                results.append(None)
+                continue
+            
+            try:
+                summary = safety_guard.sanitize(summary, sources=[f"Article ID: {article_id}"])
+            except SafetyViolationError as e:
+                results.append(self._summary_error(article, e))
+                continue
+            
+            results.append({
+                "id": article_id,
+                "summary": summary,
+                "sentiment": article.get("sentiment", {})
+            })
+        
+        return results
+    
+    def _batch_summarize(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Summarize several articles with one request.
+        
+        Articles without text are answered locally, and any article the
+        batch response does not cover is summarized on its own.
+        
+        Args:
+            batch: Article dicts with "id", "text", and optionally "sentiment"
+        
+        Returns:
+            Summary results, in input order
+        """
+        pending = [article for article in batch if article.get("text")]
+        if len(pending) < 2:
+            return [self.summarize_article(article) for article in batch]
+        
+        try:
+            prompt, payload = self._batch_prompt(pending)
+            response_text = self._safe_generate(
+                prompt,
+                cache_text=payload,
+                prefix_tokens=self._batch_prefix_tokens,
+                sanitize=False,
+                semantic=False
+            )
+            parsed = self._parse_batch(response_text, pending)
+        except Exception as e:
+            parsed = [self._summary_error(article, e) for article in pending]
+        
+        by_article = {id(article): result for article, result in zip(pending, parsed)}
+        return [
+            by_article.get(id(article)) or self.summarize_article(article)
+            for article in batch
+        ]
+    
+    async def _batch_summarize_async(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Async version of _batch_summarize.
+        
+        Args:
+            batch: Article dicts with "id", "text", and optionally "sentiment"
+        
+        Returns:
+            Summary results, in input order
+        """
+        pending = [article for article in batch if article.get("text")]
+        if len(pending) < 2:
+            return [await self.summarize_article_async(article) for article in batch]
+        
+        try:
+            prompt, payload = self._batch_prompt(pending)
+            response_text = await self._safe_generate_async(
+                prompt,
+                cache_text=payload,
+                prefix_tokens=self._batch_prefix_tokens,
+                sanitize=False,
+                semantic=False
+            )
+            parsed = await self._off_loop(len(response_text), self._parse_batch, response_text, pending)
+        except Exception as e:
+            parsed = [self._summary_error(article, e) for article in pending]
+        
+        by_article = {id(article): result for article, result in zip(pending, parsed)}
+        results = []
+        for article in batch:
+            result = by_article.get(id(article))
+            if result is None:
+                result = await self.summarize_article_async(article)
+            results.append(result)
+        return results
     
     def interpret_regulation(self, regulatory_text: str) -> Dict[str, Any]:
         """
@@ -230,23 +961,17 @@ Return your response in JSON format with the following structure:
         
         try:
             # Generate regulatory interpretation using safe wrapper
-            prompt = f"{self.regulation_prompt}\n\nRegulatory Update: {regulatory_text}"
-            response_text = self._safe_generate(prompt)
+            prompt = self._reg_prefix + regulatory_text
+            response_text = self._safe_generate(
+                prompt,
+                cache_text=regulatory_text,
+                prefix_tokens=self._reg_prefix_tokens
+            )
             
             # Remove markdown code block if present
-            if response_text.startswith("```json"):
-                response_text = response_text.replace("```json", "").replace("```", "").strip()
-            elif response_text.startswith("```"):
-                response_text = response_text.replace("```", "").strip()
+            response_text = _strip_fence(response_text)
             
-            result = json.loads(response_text)
-            
-            # Validate required fields
-            required_fields = ["impact", "affected_sectors", "risk_level", "explanation"]
-            if not all(field in result for field in required_fields):
-                raise ValueError("Missing required fields in response")
-            
-            return result
+            return _parse_regulation(response_text)
         
         except json.JSONDecodeError as e:
             # Fallback if JSON parsing fails
@@ -273,6 +998,58 @@ Return your response in JSON format with the following structure:
                 "explanation": ""
             }
     
+    async def run_async(self, articles: List[Dict[str, Any]], operation: str = "summarize") -> List[Dict[str, Any]]:
+        """
+        Process a batch of articles with up to max_concurrency requests in flight.
+        
+        Summaries are requested batch_size articles at a time, so the
+        articles take ceil(len / batch_size) requests instead of one each.
+        
+        Args:
+            articles: List of article dicts
+            operation: Operation to perform ("summarize", "expand", "interpret")
+        
+        Returns:
+            List of processed articles, in input order
+        """
+        if operation != "summarize":
+            # For now, just return articles unchanged for other operations
+            return articles
+        
+        # Created per call: a semaphore is bound to the loop it is used on
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        batches = [
+            articles[start:start + self.batch_size]
+            for start in range(0, len(articles), self.batch_size)
+        ]
+        
+        async def summarize(batch):
+            async with semaphore:
+                return await self._batch_summarize_async(batch)
+        
+        results = await asyncio.gather(
+            *(summarize(batch) for batch in batches),
+            return_exceptions=True
+        )
+        
+        processed = []
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                processed.extend(self._summary_error(article, result) for article in batch)
+            else:
+                processed.extend(result)
+        return processed
+    
+    def _get_sync_loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop, running on a daemon thread, that run() submits run_async to."""
+        with self._sync_loop_lock:
+            if self._sync_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-sync-loop", daemon=True).start()
+                self._sync_loop = loop
+            return self._sync_loop
+    
     def run(self, articles: List[Dict[str, Any]], operation: str = "summarize") -> List[Dict[str, Any]]:
         """
         Process a batch of articles with the specified LLM operation.
@@ -284,8 +1061,18 @@ Return your response in JSON format with the following structure:
         Returns:
             List of processed articles
         """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            future = asyncio.run_coroutine_threadsafe(self.run_async(articles, operation), self._get_sync_loop())
+            return future.result()
+        
+        # Already inside an event loop (use run_async there); fall back to
+        # sequential calls rather than nesting loops
         if operation == "summarize":
-            return [self.summarize_article(article) for article in articles]
+            results = []
+            for start in range(0, len(articles), self.batch_size):
+                results.extend(self._batch_summarize(articles[start:start + self.batch_size]))
+            return results
         else:
-            # For now, just return articles unchanged for other operations
             return articles
@@ -0,0 +1,131 @@
+"""
+LLM Semantic Cache
+
+Reuses LLM responses for near-identical inputs (the same story republished
+by several outlets, repeated queries) instead of calling the model again.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+class SemanticCache:
+    """Embedding-similarity cache of raw LLM responses, one namespace per prompt template."""
+    
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        threshold: float = 0.92,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 10_000
+    ):
+        """
+        Args:
+            model_name: Small sentence-transformer used to embed inputs
+            threshold: Minimum cosine similarity for a cache hit
+            ttl_seconds: Age after which entries are ignored
+            max_entries: Entries kept per namespace (oldest are overwritten)
+        """
+        self.model_name = model_name
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        
+        self._model = None
+        self._namespaces: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+    
+    def _embed(self, text: str) -> np.ndarray:
+        """Normalized float32 embedding of text; the model loads on first use."""
+        if self._model is None:
+            from agents.models import get_sentence_transformer
+            self._model = get_sentence_transformer(self.model_name)
+        
+        return self._model.encode(
+            [text],
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )[0].astype(np.float32)
+    
+    def get(self, namespace: str, text: str, embedding: Optional[np.ndarray] = None) -> Optional[Any]:
+        """
+        Look up a response for an input similar to text.
+        
+        Args:
+            namespace: Prompt template the input belongs to
+            text: Variable part of the prompt
+            embedding: Normalized embedding of text, if the caller already
+                has one (skips encoding with the cache's own model)
+        
+        Returns:
+            Cached raw response, or None on a miss
+        """
+        store = self._namespaces.get(namespace)
+        if store is None or store["count"] == 0:
+            return None
+        
+        if embedding is None:
+            embedding = self._embed(text)
+        
+        with self._lock:
+            count = store["count"]
+            scores = store["embeddings"][:count] @ embedding
+            
+            # Expired entries never match
+            fresh = store["timestamps"][:count] >= time.time() - self.ttl_seconds
+            scores = np.where(fresh, scores, -1.0)
+            
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            return store["responses"][best]
+    
+    def put(self, namespace: str, text: str, response: Any, embedding: Optional[np.ndarray] = None):
+        """
+        Store the raw response for an input.
+        
+        Args:
+            namespace: Prompt template the input belongs to
+            text: Variable part of the prompt
+            response: Raw (unsanitized) LLM response, or any result object
+            embedding: Normalized embedding of text (see get)
+        """
+        if embedding is None:
+            embedding = self._embed(text)
+        
+        with self._lock:
+            store = self._namespaces.get(namespace)
+            if store is None:
+                size = min(256, self.max_entries)
+                store = self._namespaces[namespace] = {
+                    "embeddings": np.zeros((size, embedding.shape[0]), dtype=np.float32),
+                    "timestamps": np.zeros(size, dtype=np.float64),
+                    "responses": [None] * size,
+                    "count": 0,
+                    "next": 0
+                }
+            
+            # Grow by doubling up to max_entries
+            size = len(store["responses"])
+            if store["count"] == size and size < self.max_entries:
+                new_size = min(size * 2, self.max_entries)
+                store["embeddings"] = np.resize(store["embeddings"], (new_size, embedding.shape[0]))
+                store["timestamps"] = np.resize(store["timestamps"], new_size)
+                store["responses"].extend([None] * (new_size - size))
+                store["next"] = size
+            
+            # Ring buffer: once full, the oldest entry is overwritten
+            slot = store["next"]
+            store["embeddings"][slot] = embedding
+            store["timestamps"][slot] = time.time()
+            store["responses"][slot] = response
+            store["next"] = (slot + 1) % len(store["responses"])
+            store["count"] = min(store["count"] + 1, len(store["responses"]))
+    
+    def clear(self):
+        """Drop all cached responses."""
+        with self._lock:
+            self._namespaces.clear()
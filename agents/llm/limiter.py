@@ -4,9 +4,9 @@ LLM Rate Limiter
 Implements rate limiting with rolling window tracking to prevent API abuse.
 """
 
-from collections import deque
+from array import array
+import threading
 import time
-from typing import Deque
 
 
 class LLMRateLimitError(Exception):
@@ -27,9 +27,20 @@ class RateLimiter:
         self.max_tokens_per_call = max_tokens_per_call
         self.max_calls_per_request = max_calls_per_request
         
-        # Rolling window tracking
-        self.call_timestamps: Deque[float] = deque()
+        # Rolling window tracking: ring buffer of the last
+        # max_calls_per_minute call times (time.monotonic), where _head is
+        # the slot of the oldest one
+        self._timestamps = array('d', [float('-inf')] * max_calls_per_minute)
+        self._head = 0
         self.current_request_calls: int = 0
+        
+        # Shared "do not call before" deadline (time.monotonic), set when
+        # the API itself reports it is rate limited
+        self._retry_after = 0.0
+        
+        # Guards the window; held only for O(1) bookkeeping, so the same
+        # lock serves threads and coroutines without stalling the loop
+        self._lock = threading.Lock()
     
     def allow_call(self) -> bool:
         """
@@ -41,17 +52,40 @@ class RateLimiter:
         Raises:
             LLMRateLimitError: If rate limit is exceeded
         """
-        current_time = time.time()
+        with self._lock:
+            self._check(time.monotonic())
+        
+        return True
+    
+    def allow_and_register(self) -> bool:
+        """
+        Check the rate limits and register the call in one atomic step.
         
-        # Remove timestamps older than 1 minute (60 seconds)
-        while self.call_timestamps and (current_time - self.call_timestamps[0]) > 60:
-            self.call_timestamps.popleft()
+        Concurrent callers cannot all pass the check before any of them
+        registers, so the window is never over-admitted.
+        
+        Returns:
+            bool: True if the call is allowed and registered
+        
+        Raises:
+            LLMRateLimitError: If rate limit is exceeded
+        """
+        with self._lock:
+            current_time = time.monotonic()
+            self._check(current_time)
+            self._register(current_time)
         
-        # Check calls per minute limit
-        if len(self.call_timestamps) >= self.max_calls_per_minute:
+        return True
+    
+    def _check(self, current_time: float):
+        """Raise LLMRateLimitError if a call now would exceed a limit."""
+        # Check calls per minute limit: the window is full when the oldest
+        # of the last max_calls_per_minute calls is under 1 minute old
+        oldest = self._timestamps[self._head]
+        if (current_time - oldest) <= 60:
             raise LLMRateLimitError(
                 f"Rate limit exceeded: {self.max_calls_per_minute} calls per minute. "
-                f"Please wait {60 - (current_time - self.call_timestamps[0]):.1f} seconds."
+                f"Please wait {60 - (current_time - oldest):.1f} seconds."
             )
         
         # Check calls per request limit
@@ -60,28 +94,44 @@ class RateLimiter:
                 f"Request limit exceeded: Maximum {self.max_calls_per_request} LLM calls per request. "
                 f"Please reduce query complexity."
             )
-        
-        return True
     
     def register_call(self):
         """Register a successful call."""
-        current_time = time.time()
-        self.call_timestamps.append(current_time)
+        with self._lock:
+            self._register(time.monotonic())
+    
+    def _register(self, current_time: float):
+        """Record a call made at current_time."""
+        self._timestamps[self._head] = current_time
+        self._head = (self._head + 1) % self.max_calls_per_minute
         self.current_request_calls += 1
     
+    def defer(self, seconds: float):
+        """
+        Hold off every caller for at least seconds from now.
+        
+        Args:
+            seconds: Minimum pause before the next call
+        """
+        with self._lock:
+            self._retry_after = max(self._retry_after, time.monotonic() + seconds)
+    
+    def retry_delay(self) -> float:
+        """Seconds left until the shared retry deadline (0 if none)."""
+        return max(0.0, self._retry_after - time.monotonic())
+    
     def reset_request_counter(self):
         """Reset the per-request call counter."""
-        self.current_request_calls = 0
+        with self._lock:
+            self.current_request_calls = 0
     
     def get_remaining_calls(self) -> int:
         """Get remaining calls in current window."""
-        current_time = time.time()
-        
-        # Clean old timestamps
-        while self.call_timestamps and (current_time - self.call_timestamps[0]) > 60:
-            self.call_timestamps.popleft()
+        current_time = time.monotonic()
         
-        return max(0, self.max_calls_per_minute - len(self.call_timestamps))
+        with self._lock:
+            recent_calls = sum(1 for ts in self._timestamps if (current_time - ts) <= 60)
+        return max(0, self.max_calls_per_minute - recent_calls)
 
 
 # Global singleton instance
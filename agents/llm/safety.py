@@ -4,8 +4,24 @@ LLM Safety Guard
 Implements content safety filters, citation enforcement, and hallucination prevention.
 """
 
+import functools
 import re
-from typing import List
+from typing import List, Tuple
+
+import ahocorasick
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_MULTI_NEWLINE_RE = re.compile(r'\n{3,}')
+_CITATION_RE = re.compile(r'sources?:', re.IGNORECASE)
+_LAST_TERMINATOR_RE = re.compile(r'[.!?](?=[^.!?]*$)')
+
+_CITATION_NOTE = "\n\nNote: This summary is based on retrieved financial news articles."
+
+
+@functools.lru_cache(maxsize=1024)
+def _sources_suffix(sources: Tuple[str, ...]) -> str:
+    """Citation appended for sources; cached since retries and cache hits repeat the same list."""
+    return f"\n\nSources: {', '.join(sources)}"
 
 
 class SafetyViolationError(Exception):
@@ -13,6 +29,51 @@ class SafetyViolationError(Exception):
     pass
 
 
+def _advice_violation(phrase: str) -> SafetyViolationError:
+    """Error raised for a response containing a banned phrase."""
+    return SafetyViolationError(
+        f"Response blocked: Contains financial advice phrase '{phrase}'. "
+        f"LLM should provide factual information only, not investment recommendations."
+    )
+
+
+class BannedPhraseScanner:
+    """
+    Incremental banned-phrase check over a streamed response.
+    
+    Text is checked one completed sentence at a time, after the same
+    whitespace and hallucination filtering sanitize applies, so a phrase
+    inside a sentence sanitize would drop does not stop the stream.
+    Banned phrases never contain sentence terminators, so none is split
+    across the checked pieces; the unfinished tail is left to sanitize.
+    """
+    
+    def __init__(self, automaton, clean):
+        self._automaton = automaton
+        self._clean = clean
+        self._pending = ""
+    
+    def feed(self, chunk: str):
+        """
+        Scan the next chunk of the response.
+        
+        Args:
+            chunk: Newly received response text
+        
+        Raises:
+            SafetyViolationError: If a kept sentence contains a banned phrase
+        """
+        text = self._pending + chunk
+        match = _LAST_TERMINATOR_RE.search(text)
+        if match is None:
+            self._pending = text
+            return
+        
+        self._pending = text[match.end():]
+        for _, phrase in self._automaton.iter(self._clean(text[:match.end()]).lower()):
+            raise _advice_violation(phrase)
+
+
 class SafetyGuard:
     """Safety guard for LLM responses."""
     
@@ -41,6 +102,54 @@ class SafetyGuard:
         r"from my perspective"
     ]
     
+    def __init__(self):
+        # All banned phrases in one automaton: a single pass over the
+        # response however many phrases there are
+        self._banned_automaton = ahocorasick.Automaton()
+        for phrase in self.BANNED_PHRASES:
+            self._banned_automaton.add_word(phrase.lower(), phrase)
+        self._banned_automaton.make_automaton()
+        
+        # One alternation removes every hallucination pattern in one pass
+        self._hallucination_re = re.compile(
+            "(?:" + "|".join(self.HALLUCINATION_PATTERNS) + r")[^.!?]*[.!?]",
+            re.IGNORECASE
+        )
+        
+        self._fast_sanitize = self._build_fast_sanitize()
+    
+    def _build_fast_sanitize(self):
+        """
+        Build the strict sanitize pipeline as one specialized function.
+        
+        The compiled regexes and automaton are bound as closure variables,
+        so a call makes no attribute lookups or per-step method calls. The
+        result matches normalize_response -> remove_hallucinations ->
+        block_financial_advice -> enforce_citations.
+        """
+        whitespace_sub = _WHITESPACE_RE.sub
+        hallucination_sub = self._hallucination_re.sub
+        banned_iter = self._banned_automaton.iter
+        citation_search = _CITATION_RE.search
+        
+        def fast_sanitize(text: str, sources: List[str] = None) -> str:
+            if not text:
+                return ""
+            
+            # Whitespace runs (newlines included) collapse to one space, so
+            # normalize_response's newline pass has nothing left to do
+            text = hallucination_sub('', whitespace_sub(' ', text).strip()).strip()
+            
+            for _, phrase in banned_iter(text.lower()):
+                raise _advice_violation(phrase)
+            
+            if citation_search(text) is None:
+                text += _sources_suffix(tuple(sources)) if sources else _CITATION_NOTE
+            
+            return text
+        
+        return fast_sanitize
+    
     def normalize_response(self, text: str) -> str:
         """
         Normalize response text by removing extra whitespace and formatting.
@@ -55,10 +164,10 @@ class SafetyGuard:
             return ""
         
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         
         # Remove multiple newlines
-        text = re.sub(r'\n{3,}', '\n\n', text)
+        text = _MULTI_NEWLINE_RE.sub('\n\n', text)
         
         return text.strip()
     
@@ -75,17 +184,28 @@ class SafetyGuard:
         Raises:
             SafetyViolationError: If banned phrases detected
         """
-        text_lower = text.lower()
-        
-        for phrase in self.BANNED_PHRASES:
-            if phrase in text_lower:
-                raise SafetyViolationError(
-                    f"Response blocked: Contains financial advice phrase '{phrase}'. "
-                    f"LLM should provide factual information only, not investment recommendations."
-                )
+        for _, phrase in self._banned_automaton.iter(text.lower()):
+            raise _advice_violation(phrase)
         
         return text
     
+    def stream_scanner(self) -> BannedPhraseScanner:
+        """
+        Banned-phrase scanner for a response that arrives in chunks.
+        
+        Lets a streamed generation be aborted at the first banned phrase
+        that sanitize would also reject; the complete response still goes
+        through sanitize.
+        
+        Returns:
+            BannedPhraseScanner fed with each chunk
+        """
+        hallucination_sub = self._hallucination_re.sub
+        return BannedPhraseScanner(
+            self._banned_automaton,
+            lambda text: hallucination_sub('', _WHITESPACE_RE.sub(' ', text))
+        )
+    
     def remove_hallucinations(self, text: str) -> str:
         """
         Remove hallucination patterns like personal opinions.
@@ -96,14 +216,8 @@ class SafetyGuard:
         Returns:
             Text with hallucinations removed
         """
-        for pattern in self.HALLUCINATION_PATTERNS:
-            # Remove sentences containing hallucination patterns
-            text = re.sub(
-                pattern + r'[^.!?]*[.!?]',
-                '',
-                text,
-                flags=re.IGNORECASE
-            )
+        # Remove sentences containing hallucination patterns
+        text = self._hallucination_re.sub('', text)
         
         return text.strip()
     
@@ -119,15 +233,14 @@ class SafetyGuard:
             Text with citations appended if missing
         """
         # Check if response already has citations
-        has_citations = bool(re.search(r'sources?:', text, re.IGNORECASE))
+        has_citations = _CITATION_RE.search(text) is not None
         
         if not has_citations and sources:
             # Append sources
-            sources_text = f"\n\nSources: {', '.join(sources)}"
-            text = text + sources_text
+            text = text + _sources_suffix(tuple(sources))
         elif not has_citations:
             # Add generic citation reminder
-            text = text + "\n\nNote: This summary is based on retrieved financial news articles."
+            text = text + _CITATION_NOTE
         
         return text
     
@@ -151,6 +264,9 @@ class SafetyGuard:
         Raises:
             SafetyViolationError: If strict=True and violations detected
         """
+        if strict:
+            return self._fast_sanitize(text, sources)
+        
         if not text:
             return ""
         
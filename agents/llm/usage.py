@@ -5,6 +5,7 @@ Tracks API calls, tokens, latency, failures, and cost estimation for Gemini LLM.
 """
 
 from typing import Dict
+import threading
 import time
 
 
@@ -18,22 +19,39 @@ class UsageTracker:
         self.total_failures: int = 0
         self.total_latency: float = 0.0
         self.avg_latency: float = 0.0
+        self.total_cache_hits: int = 0
         self.cost_per_1m_tokens: float = 0.20  # Gemini 2.5 Flash approx (USD)
+        
+        # Concurrent calls (async batches, executor threads) update the
+        # counters together; the lock keeps increments from being lost
+        self._lock = threading.Lock()
     
     def record_call(self, input_tokens: int, output_tokens: int, latency: float):
         """Record a successful LLM API call."""
-        self.total_calls += 1
-        self.total_input_tokens += input_tokens
-        self.total_output_tokens += output_tokens
-        self.total_latency += latency
-        self.avg_latency = self.total_latency / self.total_calls
+        with self._lock:
+            self.total_calls += 1
+            self.total_input_tokens += input_tokens
+            self.total_output_tokens += output_tokens
+            self.total_latency += latency
+            self.avg_latency = self.total_latency / self.total_calls
     
     def record_failure(self):
         """Record a failed LLM API call."""
-        self.total_failures += 1
+        with self._lock:
+            self.total_failures += 1
+    
+    def record_cache_hit(self):
+        """Record a response served from cache without calling the API."""
+        with self._lock:
+            self.total_cache_hits += 1
     
     def get_stats(self) -> Dict:
         """Get current usage statistics with cost estimation."""
+        with self._lock:
+            return self._stats()
+    
+    def _stats(self) -> Dict:
+        """Statistics snapshot; the caller holds the lock."""
         total_tokens = self.total_input_tokens + self.total_output_tokens
         cost_estimation = (total_tokens / 1_000_000) * self.cost_per_1m_tokens
         
@@ -48,6 +66,7 @@ class UsageTracker:
             "total_tokens": total_tokens,
             "total_failures": self.total_failures,
             "failure_rate": round(failure_rate, 4),
+            "total_cache_hits": self.total_cache_hits,
             "avg_latency_ms": round(self.avg_latency * 1000, 2),
             "cost_estimation_usd": round(cost_estimation, 6),
             "cost_per_1m_tokens_usd": self.cost_per_1m_tokens
@@ -55,12 +74,14 @@ class UsageTracker:
     
     def reset(self):
         """Reset all usage statistics."""
-        self.total_calls = 0
-        self.total_input_tokens = 0
-        self.total_output_tokens = 0
-        self.total_failures = 0
-        self.total_latency = 0.0
-        self.avg_latency = 0.0
+        with self._lock:
+            self.total_calls = 0
+            self.total_input_tokens = 0
+            self.total_output_tokens = 0
+            self.total_failures = 0
+            self.total_latency = 0.0
+            self.avg_latency = 0.0
+            self.total_cache_hits = 0
 
 
 # Global singleton instance
@@ -0,0 +1,204 @@
+"""
+Shared Model Loading
+
+Loads heavyweight NLP models once per process so every agent and graph node
+reuses the same instance instead of paying the load time and memory again.
+"""
+
+import functools
+import os
+from typing import List, Tuple
+
+# spaCy components not needed when only doc.ents is read; NER keeps its
+# own tok2vec, so entities are unchanged with these disabled
+SPACY_NER_ONLY = ("tagger", "parser", "lemmatizer", "attribute_ruler")
+
+
+@functools.lru_cache(maxsize=4)
+def get_sentence_transformer(model_name: str = "sentence-transformers/all-mpnet-base-v2"):
+    """
+    Get the shared SentenceTransformer for a model name.
+    
+    The model runs in half precision when CUDA is available.
+    
+    Args:
+        model_name: HuggingFace model for encoding text
+    
+    Returns:
+        SentenceTransformer instance
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    
+    model = SentenceTransformer(model_name)
+    
+    # Half precision halves encoder memory traffic on GPU
+    if torch.cuda.is_available():
+        model.half()
+    
+    return model
+
+
+class OnnxSentenceEncoder:
+    """
+    int8-quantized ONNX Runtime replacement for SentenceTransformer.encode.
+    
+    Expects a model directory produced once with:
+        
+        optimum-cli export onnx --model sentence-transformers/all-mpnet-base-v2 \\
+            --optimize O3 mpnet_onnx/
+        optimum-cli onnxruntime quantize --onnx_model mpnet_onnx/ \\
+            --avx512_vnni -o mpnet_onnx_int8/
+    
+    Token embeddings are mean-pooled over the attention mask, matching the
+    pooling layer of all-mpnet-base-v2.
+    """
+    
+    def __init__(self, model_path: str, max_length: int = 384):
+        try:
+            from optimum.onnxruntime import ORTModelForFeatureExtraction
+            from transformers import AutoTokenizer
+        except ImportError:
+            raise Exception(
+                "ONNX encoder requires optimum with onnxruntime. "
+                "Please install it with: pip install optimum[onnxruntime]"
+            )
+        
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(model_path)
+        self.max_length = max_length
+    
+    def encode(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        convert_to_tensor: bool = False,
+        normalize_embeddings: bool = False,
+        **kwargs
+    ):
+        """
+        Encode texts into sentence embeddings.
+        
+        Args:
+            texts: Texts to encode
+            batch_size: Number of texts per forward pass
+            convert_to_numpy: Return a numpy array (default)
+            convert_to_tensor: Return a torch.Tensor instead
+            normalize_embeddings: L2-normalize each embedding
+        
+        Returns:
+            Embeddings of shape (len(texts), dim)
+        """
+        import torch
+        
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="pt"
+            )
+            outputs = self.model(**inputs)
+            
+            mask = inputs["attention_mask"].unsqueeze(-1).to(outputs.last_hidden_state.dtype)
+            pooled = (outputs.last_hidden_state * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            batches.append(pooled)
+        
+        embeddings = torch.cat(batches) if batches else torch.empty(0)
+        
+        if normalize_embeddings and len(batches):
+            embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1)
+        
+        if convert_to_tensor:
+            return embeddings
+        return embeddings.numpy()
+
+
+@functools.lru_cache(maxsize=2)
+def get_onnx_encoder(model_path: str) -> OnnxSentenceEncoder:
+    """
+    Get the shared int8 ONNX sentence encoder for a model directory.
+    
+    Args:
+        model_path: Directory with the quantized ONNX export
+    
+    Returns:
+        OnnxSentenceEncoder instance
+    """
+    return OnnxSentenceEncoder(model_path)
+
+
+@functools.lru_cache(maxsize=4)
+def get_onnx_session(model_path: str):
+    """
+    Get the shared ONNX Runtime CPU session for a model file.
+    
+    Args:
+        model_path: Path to the .onnx model
+    
+    Returns:
+        onnxruntime.InferenceSession with full graph optimizations and one
+        intra-op thread per core
+    """
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        raise Exception(
+            "ONNX models require onnxruntime. "
+            "Please install it with: pip install onnxruntime"
+        )
+    
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = os.cpu_count() or 1
+    
+    return ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+
+# Set by prefer_spacy_gpu; spaCy stays on CPU unless it is called
+_spacy_gpu = False
+
+
+def prefer_spacy_gpu() -> bool:
+    """
+    Move spaCy to the GPU for the whole process, if one is available.
+    
+    This changes global state, so it is called once at startup (or by a
+    batch script), before any spaCy model is loaded.
+    
+    Returns:
+        True if spaCy now runs on the GPU
+    """
+    global _spacy_gpu
+    import spacy
+    
+    _spacy_gpu = bool(spacy.prefer_gpu())
+    return _spacy_gpu
+
+
+def spacy_on_gpu() -> bool:
+    """Whether prefer_spacy_gpu has moved spaCy to the GPU."""
+    return _spacy_gpu
+
+
+@functools.lru_cache(maxsize=4)
+def get_spacy_model(model_name: str = "en_core_web_sm", disable: Tuple[str, ...] = ()):
+    """
+    Get the shared spaCy pipeline for a model name and disabled components.
+    
+    Args:
+        model_name: spaCy model to load
+        disable: Pipeline components to disable
+    
+    Returns:
+        spacy.Language instance
+    
+    Raises:
+        OSError: If the spaCy model is not installed
+    """
+    import spacy
+    
+    return spacy.load(model_name, disable=list(disable))
@@ -1,30 +1,67 @@
 import chromadb
-from sentence_transformers import SentenceTransformer
-import spacy
-from typing import List, Dict, Any
+import copy
+import json
+import threading
+import ahocorasick
+import numpy as np
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
 from vector_store import chroma_db
+from agents.models import SPACY_NER_ONLY, get_sentence_transformer, get_spacy_model
+from agents.llm.cache import SemanticCache
+
+# Entity lists stored as comma-joined metadata, and the ones used for boosting
+_ENTITY_KEYS = ("companies", "sectors", "regulators", "events")
+_BOOST_KEYS = ("companies", "sectors", "regulators")
+
+
+def _boost_field(values: List[str]) -> str:
+    """Entity values as one lowercase "|a|b|" string (Chroma metadata must be scalar)."""
+    return "|" + "|".join(value.lower() for value in values if value) + "|"
+
+
+def _keyword_automaton(keywords) -> ahocorasick.Automaton:
+    """Aho-Corasick automaton finding every keyword in one pass over a text."""
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
 
 
 class QueryAgent:
-    def __init__(self, model_name="sentence-transformers/all-mpnet-base-v2", collection_name=None):
+    def __init__(self, model_name="sentence-transformers/all-mpnet-base-v2", collection_name=None, batch_size=64):
         """
         Initialize the QueryAgent with ChromaDB and sentence transformers.
         
         Args:
             model_name: Sentence transformer model for embeddings
             collection_name: Name of the ChromaDB collection (defaults to COLLECTION_NAME)
+            batch_size: Articles encoded per forward pass when indexing
         """
         # Initialize embedding model
-        self.model = SentenceTransformer(model_name)
+        self.model = get_sentence_transformer(model_name)
+        self.batch_size = batch_size
+        
+        # Repeated query strings reuse their embedding (LRU)
+        self.query_cache_size = 1024
+        self._query_emb_cache = OrderedDict()
+        self._query_emb_lock = threading.Lock()
         
         # Initialize ChromaDB with persistent storage
         if collection_name is None:
             collection_name = chroma_db.COLLECTION_NAME
+        self.collection_name = collection_name
         self.collection = chroma_db.get_or_create_collection(collection_name)
         
-        # Load spaCy for query intent extraction
+        # Paraphrased queries (cosine >= 0.95) reuse the ranked results;
+        # cleared whenever anything writes to the collection
+        self.result_cache = SemanticCache(threshold=0.95, max_entries=512)
+        self._result_version = chroma_db.get_write_version(collection_name)
+        
+        # Load spaCy for query intent extraction (only NER is used)
         try:
-            self.nlp = spacy.load("en_core_web_sm")
+            self.nlp = get_spacy_model("en_core_web_sm", disable=SPACY_NER_ONLY)
         except OSError:
             raise Exception(
                 "spaCy model 'en_core_web_sm' not found. "
@@ -39,6 +76,8 @@ class QueryAgent:
         self.regulator_keywords = {
             "rbi", "sebi", "reserve bank", "securities board"
         }
+        self._sector_automaton = _keyword_automaton(self.sector_keywords)
+        self._regulator_automaton = _keyword_automaton(self.regulator_keywords)
     
     def index_articles(self, articles: List[Dict[str, Any]]):
         """
@@ -51,28 +90,29 @@ class QueryAgent:
             return
         
         # Prepare data for ChromaDB
-        ids = []
-        embeddings = []
-        documents = []
-        metadatas = []
+        ids = [str(article["id"]) for article in articles]
+        documents = [article.get("text", "") for article in articles]
         
+        # Encode each distinct text once (syndicated stories repeat verbatim),
+        # in batched forward passes instead of one by one
+        positions = {}
+        inverse = [positions.setdefault(document, len(positions)) for document in documents]
+        unique_embeddings = self.model.encode(
+            list(positions),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        embeddings = unique_embeddings[inverse].tolist()
+        
+        # Extract entities for metadata
+        metadatas = []
         for article in articles:
-            # Extract text and generate embedding
-            text = article.get("text", "")
-            embedding = self.model.encode(text).tolist()
-            
-            # Extract entities for metadata
             entities = article.get("entities", {})
-            metadata = {
-                "companies": ",".join(entities.get("companies", [])),
-                "sectors": ",".join(entities.get("sectors", [])),
-                "regulators": ",".join(entities.get("regulators", [])),
-                "events": ",".join(entities.get("events", []))
-            }
-            
-            ids.append(str(article["id"]))
-            embeddings.append(embedding)
-            documents.append(text)
+            metadata = {key: ",".join(entities.get(key, ())) for key in _ENTITY_KEYS}
+            # Lowercased "|a|b|" forms read by the boost in query
+            for key in _BOOST_KEYS:
+                metadata[key + "_lc"] = _boost_field(entities.get(key, ()))
             metadatas.append(metadata)
         
         # Add to ChromaDB collection
@@ -82,6 +122,67 @@ class QueryAgent:
             documents=documents,
             metadatas=metadatas
         )
+        
+        # Cached query results no longer reflect the collection
+        chroma_db.mark_collection_written(self.collection_name)
+    
+    def index_articles_bulk(self, articles: List[Dict[str, Any]]) -> int:
+        """
+        Bulk-load articles into ChromaDB, as in a full pipeline run.
+        
+        Articles whose ids are already in the collection are skipped before
+        encoding (Chroma's add ignores existing ids anyway), so re-running
+        the pipeline on the same articles does no encoder work. The rest go
+        through index_articles in chunks of the client's max batch size
+        (one chunk for any realistic run), so each chunk is one batched
+        encode and one collection.add.
+        
+        Args:
+            articles: List of enriched articles with entities
+        
+        Returns:
+            Number of articles newly added
+        """
+        if not articles:
+            return 0
+        
+        # One article per id; Chroma rejects duplicate ids within one add
+        by_id = {str(article["id"]): article for article in articles}
+        existing = set(self.collection.get(ids=list(by_id), include=[])["ids"])
+        new_articles = [article for doc_id, article in by_id.items() if doc_id not in existing]
+        if not new_articles:
+            return 0
+        
+        max_batch = chroma_db.get_client().get_max_batch_size()
+        for start in range(0, len(new_articles), max_batch):
+            self.index_articles(new_articles[start:start + max_batch])
+        
+        return len(new_articles)
+    
+    def _get_query_embedding(self, text: str) -> List[float]:
+        """
+        Embedding of a query string, encoded only on a cache miss.
+        
+        Args:
+            text: Natural language query
+        
+        Returns:
+            Query embedding as a list of floats
+        """
+        with self._query_emb_lock:
+            embedding = self._query_emb_cache.get(text)
+            if embedding is not None:
+                self._query_emb_cache.move_to_end(text)
+                return embedding
+        
+        embedding = self.model.encode(text, convert_to_numpy=True).tolist()
+        
+        with self._query_emb_lock:
+            self._query_emb_cache[text] = embedding
+            while len(self._query_emb_cache) > self.query_cache_size:
+                self._query_emb_cache.popitem(last=False)
+        
+        return embedding
     
     def extract_query_intent(self, query_text: str) -> Dict[str, List[str]]:
         """
@@ -106,49 +207,64 @@ class QueryAgent:
         for ent in doc.ents:
             if ent.label_ == "ORG":
                 # Check if it's a regulator
-                if any(reg in ent.text.lower() for reg in self.regulator_keywords):
+                if next(self._regulator_automaton.iter(ent.text.lower()), None):
                     intent["regulators"].append(ent.text)
                 else:
                     intent["companies"].append(ent.text)
         
-        # Extract sector mentions from query
-        for sector in self.sector_keywords:
-            if sector in query_lower:
-                intent["sectors"].append(sector.title())
+        # Extract sector mentions from query (one automaton pass)
+        for _, sector in self._sector_automaton.iter(query_lower):
+            intent["sectors"].append(sector.title())
         
         # Check for regulator keywords
-        for regulator in self.regulator_keywords:
-            if regulator in query_lower:
-                intent["regulators"].append(regulator.upper())
+        for _, regulator in self._regulator_automaton.iter(query_lower):
+            intent["regulators"].append(regulator.upper())
         
-        # Deduplicate
+        # Deduplicate, keeping first-mention order so the output is deterministic
         for key in intent:
-            intent[key] = list(set(intent[key]))
+            intent[key] = list(dict.fromkeys(intent[key]))
         
         return intent
     
-    def query(self, text: str, n_results: int = 10) -> Dict[str, Any]:
+    def query(self, text: str, n_results: int = 10, where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Query the indexed articles using semantic search and context expansion.
         
         Args:
             text: Natural language query
             n_results: Maximum number of results to return
+            where: Optional Chroma metadata filter (e.g. {"sentiment": "positive"}),
+                applied inside the vector search instead of after it
             
         Returns:
             Dict with query, matched entities, and ranked results
         """
+        # Generate query embedding for semantic search
+        query_embedding = self._get_query_embedding(text)
+        
         # Extract intent from query
         matched_entities = self.extract_query_intent(text)
         
-        # Generate query embedding for semantic search
-        query_embedding = self.model.encode(text).tolist()
+        # Serve near-identical earlier queries without searching again; the
+        # intent is part of the namespace since entity boosts drive ranking
+        unit_embedding = np.asarray(query_embedding, dtype=np.float32)
+        unit_embedding /= max(float(np.linalg.norm(unit_embedding)), 1e-12)
+        cache_namespace = json.dumps([n_results, where, matched_entities], sort_keys=True)
+        version = chroma_db.get_write_version(self.collection_name)
+        if version != self._result_version:
+            self.result_cache.clear()
+            self._result_version = version
+        cached = self.result_cache.get(cache_namespace, text, embedding=unit_embedding)
+        if cached is not None:
+            # Copied so callers cannot modify the cached entry
+            return {**copy.deepcopy(cached), "query": text}
         
         # Perform semantic search
         try:
             search_results = self.collection.query(
                 query_embeddings=[query_embedding],
-                n_results=n_results * 2  # Get more to filter and rank
+                n_results=n_results * 2,  # Get more to filter and rank
+                where=where
             )
         except Exception:
             # Handle case where collection is empty
@@ -158,74 +274,74 @@ class QueryAgent:
                 "results": []
             }
         
+        # Lowercase the query entities once instead of per candidate
+        boost_fields = [
+            (field, weight, [entity.lower() for entity in matched_entities[field] if entity])
+            for field, weight in (("companies", 0.2), ("sectors", 0.15), ("regulators", 0.25))
+            if matched_entities[field]
+        ]
+        
         # Process and rank results
         results = []
-        seen_ids = set()
         
         if search_results['ids'] and len(search_results['ids'][0]) > 0:
-            for idx, doc_id in enumerate(search_results['ids'][0]):
-                if doc_id in seen_ids:
-                    continue
-                
-                seen_ids.add(doc_id)
-                
-                # Calculate relevance score
-                distance = search_results['distances'][0][idx] if 'distances' in search_results else 0
-                # Convert distance to similarity score (lower distance = higher similarity)
-                score = 1.0 / (1.0 + distance)
-                
-                # Get metadata
-                metadata = search_results['metadatas'][0][idx]
-                document = search_results['documents'][0][idx]
-                
-                # Context expansion: boost score if matches query intent
-                boost = 0.0
-                
-                # Check company matches
-                if matched_entities["companies"]:
-                    companies_in_doc = metadata.get("companies", "").split(",")
-                    for company in matched_entities["companies"]:
-                        if any(company.lower() in doc_comp.lower() for doc_comp in companies_in_doc if doc_comp):
-                            boost += 0.2
-                
-                # Check sector matches
-                if matched_entities["sectors"]:
-                    sectors_in_doc = metadata.get("sectors", "").split(",")
-                    for sector in matched_entities["sectors"]:
-                        if any(sector.lower() in doc_sect.lower() for doc_sect in sectors_in_doc if doc_sect):
-                            boost += 0.15
-                
-                # Check regulator matches
-                if matched_entities["regulators"]:
-                    regulators_in_doc = metadata.get("regulators", "").split(",")
-                    for regulator in matched_entities["regulators"]:
-                        if any(regulator.lower() in doc_reg.lower() for doc_reg in regulators_in_doc if doc_reg):
-                            boost += 0.25
-                
-                # Apply boost (cap at 1.0)
-                final_score = min(score + boost, 1.0)
+            ids = search_results['ids'][0]
+            metadatas = search_results['metadatas'][0]
+            documents = search_results['documents'][0]
+            
+            # Context expansion: count the query entities each candidate
+            # matches per field. The "|"-delimited lowercase field gives one
+            # substring search per query entity, matching when some listed
+            # entity contains it
+            hits = np.zeros((len(ids), len(boost_fields)))
+            for row, metadata in enumerate(metadatas):
+                for col, (field, _, wanted) in enumerate(boost_fields):
+                    haystack = metadata.get(field + "_lc")
+                    if haystack is None:
+                        # Indexed without the precomputed field (other writers)
+                        haystack = _boost_field(metadata.get(field, "").split(","))
+                    hits[row, col] = sum(entity in haystack for entity in wanted)
+            
+            # Score every candidate at once: similarity from distance (lower
+            # distance = higher similarity) plus boost, capped at 1.0
+            if 'distances' in search_results:
+                distances = np.asarray(search_results['distances'][0], dtype=np.float64)
+            else:
+                distances = np.zeros(len(ids))
+            weights = np.array([weight for _, weight, _ in boost_fields])
+            final_scores = np.minimum(1.0 / (1.0 + distances) + hits @ weights, 1.0)
+            scores = [round(score, 3) for score in final_scores.tolist()]
+            
+            # First occurrence of each id, ranked by score (descending, stable);
+            # entities are parsed only for the results returned
+            first_idx = {}
+            for idx, doc_id in enumerate(ids):
+                first_idx.setdefault(doc_id, idx)
+            ranked = sorted(first_idx.values(), key=scores.__getitem__, reverse=True)[:n_results]
+            
+            for idx in ranked:
+                metadata = metadatas[idx]
                 
                 # Parse entities from metadata
                 entities = {
-                    "companies": [c for c in metadata.get("companies", "").split(",") if c],
-                    "sectors": [s for s in metadata.get("sectors", "").split(",") if s],
-                    "regulators": [r for r in metadata.get("regulators", "").split(",") if r],
-                    "events": [e for e in metadata.get("events", "").split(",") if e]
+                    key: [value for value in metadata.get(key, "").split(",") if value]
+                    for key in _ENTITY_KEYS
                 }
                 
                 results.append({
-                    "id": int(doc_id),
-                    "text": document,
+                    "id": int(ids[idx]),
+                    "text": documents[idx],
                     "entities": entities,
-                    "score": round(final_score, 3)
+                    "score": scores[idx]
                 })
         
-        # Sort by score (descending) and limit results
-        results.sort(key=lambda x: x["score"], reverse=True)
-        results = results[:n_results]
-        
-        return {
+        response = {
             "query": text,
             "matched_entities": matched_entities,
             "results": results
         }
+        # Results searched before a concurrent write are not cached
+        if chroma_db.get_write_version(self.collection_name) == version:
+            self.result_cache.put(cache_namespace, text, copy.deepcopy(response), embedding=unit_embedding)
+        
+        return response
@@ -1,20 +1,53 @@
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
+import os
+import numpy as np
 from typing import List, Dict, Any
 
+from agents.models import get_onnx_session
+
 
 class SentimentAgent:
-    def __init__(self, model_name="ProsusAI/finbert"):
+    def __init__(self, model_name="ProsusAI/finbert", batch_size=32, onnx_model_path=None):
         """
         Initialize the SentimentAgent with FinBERT model.
         
+        An int8 ONNX export of the model runs instead of PyTorch when given.
+        It is produced once by exporting with
+            
+            optimum-cli export onnx --model ProsusAI/finbert finbert_onnx/
+        
+        and quantizing with onnxruntime.quantization:
+            
+            quantize_dynamic("finbert_onnx/model.onnx", "finbert_int8.onnx",
+                             weight_type=QuantType.QInt8)
+        
         Args:
             model_name: HuggingFace model for financial sentiment analysis
+            batch_size: Texts per forward pass in analyze_batch
+            onnx_model_path: Quantized ONNX model file (defaults to the
+                SENTIMENT_ONNX_MODEL env var; PyTorch is used when unset)
         """
+        self.batch_size = batch_size
+        onnx_model_path = onnx_model_path or os.getenv("SENTIMENT_ONNX_MODEL")
+        
         try:
             self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
-            self.model.eval()  # Set to evaluation mode
+            
+            if onnx_model_path:
+                self.session = get_onnx_session(onnx_model_path)
+                self.session_inputs = {i.name for i in self.session.get_inputs()}
+                self.model = None
+            else:
+                self.session = None
+                
+                # FP16 on GPU (tensor cores, half the memory traffic); FP32 on CPU
+                self.device = "cuda" if torch.cuda.is_available() else "cpu"
+                dtype = torch.float16 if self.device == "cuda" else torch.float32
+                
+                self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+                self.model.to(self.device, dtype=dtype)
+                self.model.eval()  # Set to evaluation mode
             
             # FinBERT label mapping
             self.labels = ["positive", "negative", "neutral"]
@@ -32,30 +65,80 @@ class SentimentAgent:
         Returns:
             Dict with label and confidence score
         """
-        # Tokenize input
-        inputs = self.tokenizer(
-            text,
-            return_tensors="pt",
-            truncation=True,
-            max_length=512,
-            padding=True
-        )
-        
-        # Get model predictions
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
+        return self.analyze_batch([text])[0]
+    
+    def analyze_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze sentiment of several texts with length-sorted batching.
+        
+        Distinct texts are tokenized once, sorted by token count and
+        forwarded batch_size at a time, so each batch is padded only to its
+        own longest text instead of the longest text overall. Repeated
+        texts share one prediction.
+        
+        Args:
+            texts: Input texts to analyze
+        
+        Returns:
+            List of dicts with label and confidence score, in input order
+        """
+        if not texts:
+            return []
+        
+        # Syndicated stories repeat verbatim; run each distinct text once
+        positions = {}
+        inverse = [positions.setdefault(text, len(positions)) for text in texts]
+        unique_texts = list(positions)
+        
+        encoded = self.tokenizer(unique_texts, truncation=True, max_length=512)
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+        order = sorted(range(len(unique_texts)), key=lengths.__getitem__)
+        
+        results = [None] * len(unique_texts)
+        for start in range(0, len(order), self.batch_size):
+            idxs = order[start:start + self.batch_size]
+            logits = self._logits({key: [values[i] for i in idxs] for key, values in encoded.items()})
+            
+            # The label is the argmax of the logits; only its probability is
+            # needed, exp(max - logsumexp) = 1 / sum(exp(logits - max)),
+            # so no full softmax matrix is built
+            predicted_class = logits.argmax(axis=1)
+            confidence = 1.0 / np.exp(logits - logits.max(axis=1, keepdims=True)).sum(axis=1)
+            
+            for i, label_idx, score in zip(idxs, predicted_class.tolist(), confidence.tolist()):
+                results[i] = {
+                    "label": self.labels[label_idx],
+                    "score": round(score, 4)
+                }
+        
+        # Copies, so callers can mutate one article's sentiment safely
+        return [dict(results[i]) for i in inverse]
+    
+    def _logits(self, features: Dict[str, List[List[int]]]) -> np.ndarray:
+        """
+        Class logits for one batch of tokenized texts.
+        
+        Args:
+            features: Unpadded tokenizer output (input_ids, attention_mask, ...)
         
-        # Get the predicted class and confidence
-        confidence, predicted_class = torch.max(predictions, dim=1)
+        Returns:
+            float32 logits of shape (batch, num_labels)
+        """
+        if self.session is not None:
+            inputs = self.tokenizer.pad(features, return_tensors="np")
+            logits = self.session.run(
+                None,
+                {name: np.asarray(value, dtype=np.int64) for name, value in inputs.items() if name in self.session_inputs}
+            )[0]
+            return logits.astype(np.float32, copy=False)
         
-        label = self.labels[predicted_class.item()]
-        score = confidence.item()
+        inputs = self.tokenizer.pad(features, return_tensors="pt")
+        inputs = {key: value.to(self.device) for key, value in inputs.items()}
+        with torch.inference_mode():
+            outputs = self.model(**inputs)
         
-        return {
-            "label": label,
-            "score": round(score, 4)
-        }
+        # FP32 so half-precision logits cannot overflow in the confidence
+        return outputs.logits.float().cpu().numpy()
     
     def run(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -67,17 +150,18 @@ class SentimentAgent:
         Returns:
             List of articles enriched with sentiment analysis
         """
+        # Analyze all non-empty texts in length-sorted batches
+        texts = [article.get("text", "") for article in articles]
+        sentiments = iter(self.analyze_batch([text for text in texts if text]))
+        
         enriched_articles = []
         
-        for article in articles:
+        for article, text in zip(articles, texts):
             # Create a copy to avoid mutating original
             enriched = article.copy()
             
-            # Analyze sentiment
-            text = article.get("text", "")
             if text:
-                sentiment = self.analyze_sentiment(text)
-                enriched["sentiment"] = sentiment
+                enriched["sentiment"] = next(sentiments)
             else:
                 # Handle empty text
                 enriched["sentiment"] = {
@@ -4,27 +4,65 @@ Helper functions for analysis module.
 Provides database query helpers for sentiment events and stock data.
 """
 
-from typing import List, Dict, Any, Optional
+import asyncio
+import time
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from database.db import get_session
 from database.schema import Sentiment, Article, Entity
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, and_, or_, exists, func, cast, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import selectinload
-import json
+
+
+def _stocks_contain(symbol: str):
+    """SQL filter: the entity's stocks list includes symbol (as {"symbol": ...} or a bare string)."""
+    stocks = cast(Entity.stocks, JSONB)
+    return or_(stocks.contains([{"symbol": symbol}]), stocks.contains([symbol]))
+
+
+# Stocks entries are {"symbol": ...} objects or bare strings; non-array
+# values (JSON null) are skipped instead of failing the unnest
+_SUPPORTED_SYMBOLS_SQL = text("""
+    SELECT DISTINCT sym FROM (
+        SELECT CASE jsonb_typeof(elem)
+                   WHEN 'object' THEN elem->>'symbol'
+                   WHEN 'string' THEN elem #>> '{}'
+               END AS sym
+        FROM entities,
+             jsonb_array_elements(
+                 CASE WHEN jsonb_typeof(stocks::jsonb) = 'array' THEN stocks::jsonb ELSE '[]'::jsonb END
+             ) AS elem
+    ) AS stock_symbols
+    WHERE sym IS NOT NULL AND sym <> ''
+    ORDER BY sym
+    LIMIT :limit
+""")
+
+# The symbol list changes slowly; get_supported_symbols serves it from
+# memory for this many seconds. Keyed by limit: (expires_at, symbols)
+SUPPORTED_SYMBOLS_TTL = 60.0
+_symbols_cache: Dict[int, Tuple[float, List[str]]] = {}
+_symbols_lock = asyncio.Lock()
 
 
 async def get_sentiment_events(
     symbol: str,
     min_score: float = 0.7,
-    days_back: int = 180
+    days_back: int = 180,
+    limit: Optional[int] = None
 ) -> List[Dict[str, Any]]:
     """
     Retrieve sentiment events from database for a given stock symbol.
     
+    Rows are streamed in chunks rather than loaded all at once, and
+    reading stops as soon as limit events have been collected.
+    
     Args:
         symbol: Stock ticker symbol (e.g., 'HDFCBANK', 'RELIANCE')
         min_score: Minimum sentiment score threshold (0.0 to 1.0)
         days_back: How many days back to look
+        limit: Maximum number of (most recent) events to return
     
     Returns:
         List of sentiment events with timestamp, label, score, article_id
@@ -38,54 +76,44 @@ async def get_sentiment_events(
             date_threshold = datetime.now() - timedelta(days=days_back)
             
             # Query: Find articles with entities matching the symbol
-            # and join with sentiment data
+            # and join with sentiment data. The symbol match runs in
+            # Postgres (JSONB containment) as an EXISTS semi-join, so an
+            # article with several entity rows still comes back once per
+            # sentiment instead of once per (entity, sentiment) pair
+            symbol_entity = exists().where(
+                and_(Entity.article_id == Article.id, _stocks_contain(symbol))
+            )
             query = (
-                select(Sentiment, Article, Entity)
+                select(Article.id, Article.published_at, Article.text, Sentiment.label, Sentiment.score)
                 .join(Article, Sentiment.article_id == Article.id)
-                .join(Entity, Entity.article_id == Article.id)
                 .where(
                     and_(
                         Article.published_at >= date_threshold,
-                        Sentiment.score >= min_score
+                        Sentiment.score >= min_score,
+                        symbol_entity
                     )
                 )
                 .order_by(Article.published_at.desc())
             )
             
-            result = await session.execute(query)
-            rows = result.all()
+            result = await session.stream(query.execution_options(yield_per=500))
             
             # Process results
             seen_article_ids = set()
             
-            for sentiment, article, entity in rows:
-                # Parse entity data
-                try:
-                    entity_data = json.loads(entity.entity_data) if isinstance(entity.entity_data, str) else entity.entity_data
-                except:
-                    entity_data = {}
-                
-                # Check if symbol is in impacted stocks
-                impacted_stocks = entity_data.get('impacted_stocks', [])
-                
-                symbol_match = False
-                for stock in impacted_stocks:
-                    if isinstance(stock, dict) and stock.get('symbol') == symbol:
-                        symbol_match = True
-                        break
-                    elif isinstance(stock, str) and stock == symbol:
-                        symbol_match = True
-                        break
+            async for article_id, published_at, article_text, label, score in result:
+                if limit is not None and len(events) >= limit:
+                    break
                 
-                if symbol_match and article.id not in seen_article_ids:
-                    seen_article_ids.add(article.id)
+                if article_id not in seen_article_ids:
+                    seen_article_ids.add(article_id)
                     
                     events.append({
-                        'article_id': article.id,
-                        'timestamp': article.published_at,
-                        'sentiment_label': sentiment.label.upper(),
-                        'sentiment_score': float(sentiment.score),
-                        'headline': article.title or article.text[:100]
+                        'article_id': article_id,
+                        'timestamp': published_at,
+                        'sentiment_label': label.upper(),
+                        'sentiment_score': float(score),
+                        'headline': article_text[:100]
                     })
     
         finally:
@@ -100,44 +128,42 @@ async def get_supported_symbols(limit: int = 50) -> List[str]:
     """
     Get list of stock symbols that have sentiment data.
     
+    Results are cached for SUPPORTED_SYMBOLS_TTL seconds; concurrent
+    callers on a miss wait for a single database query.
+    
     Args:
         limit: Maximum number of symbols to return
     
     Returns:
         List of stock symbols
     """
+    cached = _symbols_cache.get(limit)
+    if cached is not None and time.monotonic() < cached[0]:
+        return list(cached[1])
+    
+    async with _symbols_lock:
+        # Another caller may have refreshed it while we waited
+        cached = _symbols_cache.get(limit)
+        if cached is not None and time.monotonic() < cached[0]:
+            return list(cached[1])
+        
+        symbols = await _query_supported_symbols(limit)
+        if symbols:
+            _symbols_cache[limit] = (time.monotonic() + SUPPORTED_SYMBOLS_TTL, symbols)
+        return list(symbols)
+
+
+async def _query_supported_symbols(limit: int) -> List[str]:
+    """Distinct stock symbols from the database (empty on error)."""
     symbols = []
     
     try:
         session = await get_session()
         try:
-            # Query entities to find all unique stock symbols
-            query = select(Entity.entity_data).limit(1000)
-            result = await session.execute(query)
-            rows = result.scalars().all()
-            
-            symbol_set = set()
-            
-            for entity_data in rows:
-                try:
-                    data = json.loads(entity_data) if isinstance(entity_data, str) else entity_data
-                    impacted_stocks = data.get('impacted_stocks', [])
-                    
-                    for stock in impacted_stocks:
-                        if isinstance(stock, dict):
-                            sym = stock.get('symbol')
-                            if sym:
-                                symbol_set.add(sym)
-                        elif isinstance(stock, str):
-                            symbol_set.add(stock)
-                
-                except:
-                    continue
-                
-                if len(symbol_set) >= limit:
-                    break
-            
-            symbols = sorted(list(symbol_set))[:limit]
+            # Unnest every entity's stocks list and let Postgres return the
+            # distinct symbols, already sorted and limited
+            result = await session.execute(_SUPPORTED_SYMBOLS_SQL, {"limit": limit})
+            symbols = list(result.scalars().all())
         finally:
             await session.close()
     
@@ -9,17 +9,56 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
+import os
 import time
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
+from pathlib import Path
+
+try:
+    import pyarrow  # parquet engine for the on-disk price cache
+except ImportError:
+    pyarrow = None
 
 
 class PriceImpactModel:
     """Historical price impact backtest for sentiment events."""
     
-    def __init__(self, max_retries: int = 3):
+    def __init__(
+        self,
+        max_retries: int = 3,
+        cache_dir: Optional[str] = None,
+        max_download_workers: int = 8,
+        recent_ttl_seconds: float = 900.0
+    ):
+        """
+        Args:
+            max_retries: Download attempts per request
+            max_download_workers: Threads for concurrent price downloads
+            cache_dir: Directory for the on-disk parquet price cache
+                (defaults to PRICE_CACHE_DIR or ~/.cache/finnews/prices;
+                pyarrow is in the requirements, and without it only the
+                in-memory cache is used)
+            recent_ttl_seconds: How long bars dated on or after the fetch
+                day (which may still change) are served from the cache
+        """
         self.max_retries = max_retries
+        self.recent_ttl_seconds = recent_ttl_seconds
+        self.cache_dir = Path(
+            cache_dir or os.getenv("PRICE_CACHE_DIR") or Path.home() / ".cache" / "finnews" / "prices"
+        )
+        
+        # symbol -> (widest price frame fetched, (covered_start, covered_end), fetched_at)
         self._cache = {}
+        
+        # One lock per symbol: concurrent requests for a symbol wait for a
+        # single download and are then served from the cache
+        self._symbol_locks = {}
+        
+        # yfinance downloads are IO-bound, so threads overlap them fine
+        self._pool = ThreadPoolExecutor(max_workers=max_download_workers, thread_name_prefix="price-download")
     
     def download_price_data(
         self,
@@ -30,19 +69,58 @@ class PriceImpactModel:
         """
         Download OHLC price data with retry logic.
         
+        The widest range fetched per symbol is kept in memory and on disk;
+        requests inside it are sliced from the cache, and requests outside
+        it fetch the union range once so the cached frame stays contiguous.
+        Requests are capped at today, and bars from the fetch day onwards
+        are only trusted for recent_ttl_seconds after the download.
+        
         Args:
             symbol: Stock ticker symbol
             start_date: Start date for data
-            end_date: End date for data
+            end_date: End date for data (exclusive)
         
         Returns:
             DataFrame with OHLC data or None if failed
         """
-        cache_key = f"{symbol}_{start_date.date()}_{end_date.date()}"
+        start = pd.Timestamp(start_date.date())
+        # No bars exist past today, so asking for them must not miss the cache
+        end = min(pd.Timestamp(end_date.date()), pd.Timestamp(datetime.now().date()) + pd.Timedelta(days=1))
         
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        with self._symbol_locks.setdefault(symbol, threading.Lock()):
+            cached = self._cache.get(symbol) or self._load_cached(symbol)
+            
+            if cached is not None:
+                cached_data, (covered_start, covered_end), fetched_at = cached
+                if time.time() - fetched_at > self.recent_ttl_seconds:
+                    # Bars from the fetch day onwards may have changed since
+                    covered_end = min(covered_end, pd.Timestamp(datetime.fromtimestamp(fetched_at).date()))
+                if covered_start <= start and end <= covered_end:
+                    return self._slice_prices(cached_data, start, end)
+                start, end = min(start, covered_start), max(end, covered_end)
+            
+            data = self._fetch_history(symbol, start, end)
+            if data is None:
+                return None
+            
+            if cached is not None:
+                data = pd.concat([cached_data, data])
+                data = data[~data.index.duplicated(keep="last")].sort_index()
+            
+            covered = (start, end)
+            fetched_at = time.time()
+            self._cache[symbol] = (data, covered, fetched_at)
+            self._store_cached(symbol, data, covered, fetched_at)
         
+        return self._slice_prices(data, pd.Timestamp(start_date.date()), pd.Timestamp(end_date.date()))
+    
+    def _fetch_history(
+        self,
+        symbol: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Optional[pd.DataFrame]:
+        """Fetch OHLC history from yfinance, retrying empty or failed downloads."""
         for attempt in range(self.max_retries):
             try:
                 ticker = yf.Ticker(symbol)
@@ -54,8 +132,6 @@ class PriceImpactModel:
                         continue
                     return None
                 
-                # Cache successful download
-                self._cache[cache_key] = data
                 return data
             
             except Exception as e:
@@ -67,6 +143,62 @@ class PriceImpactModel:
         
         return None
     
+    @staticmethod
+    def _slice_prices(data: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> Optional[pd.DataFrame]:
+        """Rows of a cached frame dated in [start, end), or None if there are none."""
+        days = data.index.tz_localize(None).normalize()
+        sliced = data[(days >= start) & (days < end)]
+        return sliced if not sliced.empty else None
+    
+    def _cache_path(self, symbol: str) -> Path:
+        """Parquet file holding a symbol's cached prices."""
+        return self.cache_dir / f"{symbol}.parquet"
+    
+    def _load_cached(
+        self,
+        symbol: str
+    ) -> Optional[Tuple[pd.DataFrame, Tuple[pd.Timestamp, pd.Timestamp], float]]:
+        """Read a symbol's price frame, covered range and fetch time from the disk cache."""
+        path = self._cache_path(symbol)
+        if pyarrow is None or not path.exists():
+            return None
+        
+        try:
+            data = pd.read_parquet(path, engine="pyarrow")
+            covered_start, covered_end = data.attrs["covered"]
+            # Files written before fetch times were recorded stopped coverage before the fetch day
+            fetched_at = float(data.attrs.get("fetched_at") or pd.Timestamp(covered_end).timestamp())
+        except Exception as e:
+            print(f"Ignoring unreadable price cache {path}: {e}")
+            return None
+        
+        cached = (data, (pd.Timestamp(covered_start), pd.Timestamp(covered_end)), fetched_at)
+        self._cache[symbol] = cached
+        return cached
+    
+    def _store_cached(
+        self,
+        symbol: str,
+        data: pd.DataFrame,
+        covered: Tuple[pd.Timestamp, pd.Timestamp],
+        fetched_at: float
+    ):
+        """Write a symbol's price frame to the disk cache (atomically replaced)."""
+        if pyarrow is None:
+            return
+        
+        path = self._cache_path(symbol)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            data = data.copy()
+            data.attrs["covered"] = [covered[0].isoformat(), covered[1].isoformat()]
+            data.attrs["fetched_at"] = fetched_at
+            data.to_parquet(tmp_path, engine="pyarrow")
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write price cache {path}: {e}")
+    
     def compute_forward_returns(
         self,
         price_data: pd.DataFrame,
@@ -82,46 +214,67 @@ class PriceImpactModel:
         Returns:
             Dict with return_1d, return_3d, return_7d
         """
-        returns = {
-            "return_1d": None,
-            "return_3d": None,
-            "return_7d": None
-        }
+        return self.compute_forward_returns_batch(price_data, [event_date])[0]
+    
+    def compute_forward_returns_batch(
+        self,
+        price_data: pd.DataFrame,
+        event_dates: List[datetime]
+    ) -> List[Dict[str, float]]:
+        """
+        Compute forward returns for 1d, 3d, 7d for many events at once.
         
-        try:
-            # Normalize event date (remove timezone and time info)
-            if isinstance(event_date, pd.Timestamp):
-                event_date_normalized = event_date.tz_localize(None).normalize()
-            else:
-                event_date_normalized = pd.Timestamp(event_date).tz_localize(None).normalize()
-            
-            # Normalize price_data index (remove timezone)
-            price_index = price_data.index.tz_localize(None).normalize()
-            
-            # Find the event date in price data
-            if event_date_normalized not in price_index:
-                # Find nearest trading day
-                future_dates = price_index[price_index >= event_date_normalized]
-                if len(future_dates) == 0:
-                    return returns
-                event_date_normalized = future_dates[0]
-            
-            # Get event price
-            event_idx = price_index.get_loc(event_date_normalized)
-            event_price = price_data['Close'].iloc[event_idx]
+        The price index is normalized once and every event is located
+        with a single searchsorted call, instead of per-event lookups.
+        
+        Args:
+            price_data: OHLC price DataFrame (sorted by date)
+            event_dates: Event timestamps
+        
+        Returns:
+            List of dicts with return_1d, return_3d, return_7d, in event order
+        """
+        results = [
+            {"return_1d": None, "return_3d": None, "return_7d": None}
+            for _ in event_dates
+        ]
+        
+        if price_data is None or price_data.empty or not event_dates:
+            return results
+        
+        # Normalize dates (remove timezone and time info)
+        price_index = price_data.index.tz_localize(None).normalize()
+        event_index = pd.DatetimeIndex(
+            [self._event_day(event_date) for event_date in event_dates]
+        ).normalize()
+        
+        # Event date, or the nearest trading day after it
+        event_idx = price_index.searchsorted(event_index, side="left")
+        closes = price_data['Close'].to_numpy(dtype=np.float64)
+        n_prices = len(closes)
+        found = ~event_index.isna() & (event_idx < n_prices)
+        
+        event_price = closes[np.minimum(event_idx, n_prices - 1)]
+        
+        # Compute returns
+        for days, key in [(1, 'return_1d'), (3, 'return_3d'), (7, 'return_7d')]:
+            future_idx = event_idx + days
+            future_price = closes[np.minimum(future_idx, n_prices - 1)]
             
-            # Compute returns
-            for days, key in [(1, 'return_1d'), (3, 'return_3d'), (7, 'return_7d')]:
-                future_idx = event_idx + days
-                
-                if future_idx < len(price_data):
-                    future_price = price_data['Close'].iloc[future_idx]
-                    returns[key] = (future_price - event_price) / event_price
+            horizon_returns = ((future_price - event_price) / event_price).tolist()
+            for i in np.flatnonzero(found & (future_idx < n_prices)).tolist():
+                results[i][key] = horizon_returns[i]
         
-        except Exception as e:
+        return results
+    
+    @staticmethod
+    def _event_day(event_date) -> pd.Timestamp:
+        """Timezone-naive event timestamp, or NaT if it cannot be parsed."""
+        try:
+            return pd.Timestamp(event_date).tz_localize(None)
+        except (TypeError, ValueError) as e:
             print(f"Error computing returns for {event_date}: {e}")
-        
-        return returns
+            return pd.NaT
     
     def compute_aggregated_metrics(
         self,
@@ -141,9 +294,12 @@ class PriceImpactModel:
         
         def calc_metrics(events: List[Dict], horizon: str) -> Dict[str, float]:
             """Calculate metrics for a specific horizon."""
-            returns = [e['returns'][horizon] for e in events if e['returns'][horizon] is not None]
+            returns = np.fromiter(
+                (e['returns'][horizon] for e in events if e['returns'][horizon] is not None),
+                dtype=np.float64
+            )
             
-            if not returns:
+            if not returns.size:
                 return {
                     'avg_return': 0.0,
                     'winrate': 0.0,
@@ -151,9 +307,9 @@ class PriceImpactModel:
                 }
             
             return {
-                'avg_return': np.mean(returns),
-                'winrate': sum(1 for r in returns if r > 0) / len(returns),
-                'count': len(returns)
+                'avg_return': float(returns.mean()),
+                'winrate': float((returns > 0).mean()),
+                'count': int(returns.size)
             }
         
         metrics = {
@@ -187,7 +343,8 @@ class PriceImpactModel:
             events: List of sentiment events with timestamp, sentiment_label, sentiment_score
         
         Returns:
-            Dict with summary metrics and per-event results
+            Dict with summary metrics, per-event results and the price
+            DataFrame used (price_data)
         """
         if len(events) < 3:
             return {
@@ -205,7 +362,7 @@ class PriceImpactModel:
         # Download price data (run in executor to avoid blocking)
         loop = asyncio.get_event_loop()
         price_data = await loop.run_in_executor(
-            None,
+            self._pool,
             self.download_price_data,
             symbol,
             start_date,
@@ -220,15 +377,12 @@ class PriceImpactModel:
                 "event_count": len(events)
             }
         
-        # Compute returns for each event
-        events_with_returns = []
-        for event in events:
-            returns = self.compute_forward_returns(price_data, event['timestamp'])
-            
-            events_with_returns.append({
-                **event,
-                'returns': returns
-            })
+        # Compute returns for all events in one pass
+        all_returns = self.compute_forward_returns_batch(price_data, event_dates)
+        events_with_returns = [
+            {**event, 'returns': returns}
+            for event, returns in zip(events, all_returns)
+        ]
         
         # Compute aggregated metrics
         metrics = self.compute_aggregated_metrics(events_with_returns)
@@ -243,8 +397,33 @@ class PriceImpactModel:
                 "trading_days": len(price_data)
             },
             "summary": metrics,
-            "events": events_with_returns
+            "events": events_with_returns,
+            # Downloaded prices, reused by generate_impact_chart (not part of the API response)
+            "price_data": price_data
         }
+    
+    async def run_backtests(
+        self,
+        symbols_events: Dict[str, List[Dict[str, Any]]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Run backtests for several symbols concurrently.
+        
+        Price downloads for the symbols overlap on the download pool
+        instead of running one after another.
+        
+        Args:
+            symbols_events: Sentiment events per stock ticker symbol
+        
+        Returns:
+            Backtest result per symbol (see run_backtest)
+        """
+        results = await asyncio.gather(*[
+            self.run_backtest(symbol, events)
+            for symbol, events in symbols_events.items()
+        ])
+        
+        return dict(zip(symbols_events, results))
 
 
 # Global singleton instance
@@ -4,21 +4,50 @@ Visualization module for price impact analysis.
 Generates charts showing sentiment events overlaid on price movements.
 """
 
-import matplotlib
-matplotlib.use('Agg')  # Non-interactive backend for server
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import io
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 from pathlib import Path
-import yfinance as yf
 
+from analysis.impact_model import impact_model
+
+# matplotlib is imported on the first chart (see _impact_figure), so the
+# API starts without it when no chart is requested
 
 # Create reports directory if it doesn't exist
 REPORTS_DIR = Path(__file__).parent.parent / "reports"
 REPORTS_DIR.mkdir(exist_ok=True)
 
+# Marker/bar color per sentiment label (neutral and unknown labels use yellow)
+_LABEL_COLORS = {'POSITIVE': '#06D6A0', 'NEGATIVE': '#EF476F', 'NEUTRAL': '#FFD166'}
+
+# Shared chart figure (see _impact_figure)
+_figure = None
+_FIGURE_LOCK = threading.Lock()
+
+# Worker processes for generate_impact_chart (see _chart_pool)
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", "2"))
+_CHART_POOL = None
+_CHART_POOL_LOCK = threading.Lock()
+
+# Chart state per (symbol, min_score, days_back) from generate_impact_chart:
+# (CHART_PENDING/CHART_READY/CHART_FAILED, PNG or None, time) (LRU, ~150KB
+# per PNG); only touched from the event loop, so no lock is needed
+CHART_PENDING = "pending"
+CHART_READY = "ready"
+CHART_FAILED = "failed"
+CHART_CACHE_SIZE = 200
+_CHART_CACHE = OrderedDict()
+
 
 def plot_price_impact(
     symbol: str,
@@ -33,47 +62,139 @@ def plot_price_impact(
         symbol: Stock ticker symbol
         price_data: OHLC price DataFrame from yfinance
         events: List of sentiment events with returns
-        output_path: Optional custom output path
+        output_path: Optional custom output path (or binary file object)
     
     Returns:
         Path to saved PNG file
     """
     if output_path is None:
-        output_path = REPORTS_DIR / f"impact_{symbol}.png"
+        output_path = impact_chart_path(symbol)
+    
+    # Charts are drawn on one shared figure; Agg rendering is not
+    # thread-safe, so one chart is drawn at a time
+    with _FIGURE_LOCK:
+        fig, (ax1, ax2) = _impact_figure()
+        ax1.cla()
+        ax2.cla()
+        fig.suptitle(f'{symbol} - Price Impact Analysis', fontsize=16, fontweight='bold')
+        
+        _draw_price_impact(ax1, ax2, price_data, events)
+        
+        fig.tight_layout()
+        
+        # Save figure: 100 dpi (1400x1000) is enough for the dashboard, and
+        # a fast zlib level trades a larger PNG for much less encode time
+        fig.savefig(output_path, format='png', dpi=100, pil_kwargs={'compress_level': 1, 'optimize': False})
+    
+    return str(output_path)
+
+
+def render_price_impact(
+    symbol: str,
+    price_data: pd.DataFrame,
+    events: List[Dict[str, Any]]
+) -> bytes:
+    """PNG bytes of the price impact chart (see plot_price_impact), without touching disk."""
+    buffer = io.BytesIO()
+    plot_price_impact(symbol, price_data, events, output_path=buffer)
+    return buffer.getvalue()
+
+
+def impact_chart_path(symbol: str) -> Path:
+    """Default PNG path of a symbol's impact chart."""
+    return REPORTS_DIR / f"impact_{symbol}.png"
+
+
+def _impact_figure():
+    """
+    Shared two-panel figure for plot_price_impact, built on first use.
+    
+    Reusing it skips figure, axes and formatter construction on every
+    chart request; callers clear the axes and hold _FIGURE_LOCK. It is
+    rendered by Agg by default, or by mplcairo when that optional extra is
+    installed (see requirements.txt); no pyplot, so no GUI backend is ever
+    selected.
+    """
+    global _figure
+    
+    if _figure is None:
+        from matplotlib.figure import Figure
+        try:
+            # mplcairo renders line/marker-heavy charts faster than Agg
+            from mplcairo.base import FigureCanvasCairo as _FigureCanvas
+        except ImportError:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg as _FigureCanvas
+        
+        fig = Figure(figsize=(14, 10))
+        _FigureCanvas(fig)
+        axes = fig.subplots(2, 1, gridspec_kw={'height_ratios': [3, 1]})
+        _figure = (fig, axes)
+    
+    return _figure
+
+
+def _event_columns(events: List[Dict[str, Any]]):
+    """
+    Timestamps, labels and 1-day returns of the events, in one pass.
+    
+    Returns:
+        (timestamps list, label array, float return array with NaN for
+        missing returns)
+    """
+    if not events:
+        return [], np.array([], dtype=str), np.array([], dtype=np.float64)
+    
+    timestamps, labels, returns_1d = zip(*[
+        (e['timestamp'], e['sentiment_label'], e['returns']['return_1d'])
+        for e in events
+    ])
+    return list(timestamps), np.array(labels, dtype=str), np.array(returns_1d, dtype=np.float64)
+
+
+def _event_days(timestamps: List[datetime]) -> pd.DatetimeIndex:
+    """Calendar day (local to each timestamp, timezone dropped) of every event."""
+    try:
+        days = pd.DatetimeIndex(timestamps)
+    except (TypeError, ValueError):
+        # Mixed timezones cannot share one index; take each wall-clock date
+        return pd.DatetimeIndex([pd.Timestamp(ts.date()) for ts in timestamps])
     
-    # Create figure with 2 subplots
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10), gridspec_kw={'height_ratios': [3, 1]})
-    fig.suptitle(f'{symbol} - Price Impact Analysis', fontsize=16, fontweight='bold')
+    if days.tz is not None:
+        days = days.tz_localize(None)
+    return days.normalize()
+
+
+def _draw_price_impact(ax1, ax2, price_data: pd.DataFrame, events: List[Dict[str, Any]]):
+    """Draw the price/event panel (ax1) and the 1-day return bars (ax2)."""
+    import matplotlib.dates as mdates
+    from matplotlib.artist import setp
+    
+    # Event columns shared by the scatter overlay and the return bars
+    timestamps, labels, returns_1d = _event_columns(events)
     
     # Plot 1: Price chart with sentiment events
     ax1.plot(price_data.index, price_data['Close'], label='Close Price', color='#2E86AB', linewidth=1.5)
     
-    # Overlay sentiment events
-    positive_events = [e for e in events if e['sentiment_label'] == 'POSITIVE']
-    negative_events = [e for e in events if e['sentiment_label'] == 'NEGATIVE']
-    neutral_events = [e for e in events if e['sentiment_label'] == 'NEUTRAL']
-    
-    # Get prices at event dates
-    for event in positive_events:
-        event_date = pd.Timestamp(event['timestamp'].date())
-        if event_date in price_data.index:
-            price = price_data.loc[event_date, 'Close']
-            ax1.scatter(event_date, price, color='#06D6A0', s=100, marker='^', 
-                       alpha=0.7, edgecolors='black', linewidth=0.5, zorder=5)
-    
-    for event in negative_events:
-        event_date = pd.Timestamp(event['timestamp'].date())
-        if event_date in price_data.index:
-            price = price_data.loc[event_date, 'Close']
-            ax1.scatter(event_date, price, color='#EF476F', s=100, marker='v', 
-                       alpha=0.7, edgecolors='black', linewidth=0.5, zorder=5)
-    
-    for event in neutral_events:
-        event_date = pd.Timestamp(event['timestamp'].date())
-        if event_date in price_data.index:
-            price = price_data.loc[event_date, 'Close']
-            ax1.scatter(event_date, price, color='#FFD166', s=80, marker='o', 
-                       alpha=0.6, edgecolors='black', linewidth=0.5, zorder=5)
+    # Get prices at event dates: one indexer lookup for all events against
+    # the trading days (timezone dropped, like the event dates)
+    price_days = price_data.index.tz_localize(None).normalize()
+    event_days = _event_days(timestamps)
+    positions = price_days.get_indexer(event_days)
+    found = positions >= 0
+    
+    event_x = price_data.index[positions[found]]
+    event_y = price_data['Close'].to_numpy()[positions[found]]
+    event_labels = labels[found]
+    
+    # Overlay sentiment events, one scatter per label (matches the legend order)
+    for label, size, marker, alpha in (
+        ('POSITIVE', 100, '^', 0.7),
+        ('NEGATIVE', 100, 'v', 0.7),
+        ('NEUTRAL', 80, 'o', 0.6)
+    ):
+        is_label = event_labels == label
+        ax1.scatter(event_x[is_label], event_y[is_label], color=_LABEL_COLORS[label], s=size, marker=marker,
+                    alpha=alpha, edgecolors='black', linewidth=0.5, zorder=5)
     
     ax1.set_ylabel('Price (₹)', fontsize=12, fontweight='bold')
     ax1.grid(True, alpha=0.3, linestyle='--')
@@ -82,51 +203,92 @@ def plot_price_impact(
     
     # Format x-axis
     ax1.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-    plt.setp(ax1.xaxis.get_majorticklabels(), rotation=45, ha='right')
-    
-    # Plot 2: Forward returns distribution
-    returns_1d = [e['returns']['return_1d'] for e in events if e['returns']['return_1d'] is not None]
-    
-    if returns_1d:
-        colors = []
-        for e in events:
-            if e['returns']['return_1d'] is not None:
-                if e['sentiment_label'] == 'POSITIVE':
-                    colors.append('#06D6A0')
-                elif e['sentiment_label'] == 'NEGATIVE':
-                    colors.append('#EF476F')
-                else:
-                    colors.append('#FFD166')
-        
-        bars = ax2.bar(range(len(returns_1d)), [r * 100 for r in returns_1d], color=colors, alpha=0.7)
+    setp(ax1.xaxis.get_majorticklabels(), rotation=45, ha='right')
+    
+    # Plot 2: Forward returns distribution (missing returns are NaN and skipped)
+    has_return = ~np.isnan(returns_1d)
+    colors = np.select(
+        [labels == 'POSITIVE', labels == 'NEGATIVE'],
+        [_LABEL_COLORS['POSITIVE'], _LABEL_COLORS['NEGATIVE']],
+        default=_LABEL_COLORS['NEUTRAL']
+    )
+    
+    if has_return.any():
+        bars = ax2.bar(np.arange(has_return.sum()), returns_1d[has_return] * 100, color=colors[has_return], alpha=0.7)
         ax2.axhline(y=0, color='black', linestyle='-', linewidth=0.8)
         ax2.set_ylabel('1-Day Forward Return (%)', fontsize=11, fontweight='bold')
         ax2.set_xlabel('Event Index', fontsize=11, fontweight='bold')
         ax2.grid(True, alpha=0.3, linestyle='--', axis='y')
+
+
+def _chart_pool() -> ProcessPoolExecutor:
+    """
+    Process pool rendering charts, created on first use.
     
-    plt.tight_layout()
+    Each worker has its own figure and lock, so concurrent charts render
+    in parallel instead of queueing on _FIGURE_LOCK. Workers are spawned,
+    not forked: the API process has threads, CUDA and loaded models that
+    a fork would inherit, and a fresh interpreter only imports this module.
+    """
+    global _CHART_POOL
     
-    # Save figure
-    plt.savefig(output_path, dpi=150, bbox_inches='tight')
-    plt.close(fig)
+    with _CHART_POOL_LOCK:
+        if _CHART_POOL is None:
+            _CHART_POOL = ProcessPoolExecutor(
+                max_workers=CHART_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
     
-    return str(output_path)
+    return _CHART_POOL
+
+
+def chart_key(symbol: str, min_score: float, days_back: int) -> Tuple[str, float, int]:
+    """Cache key of the chart for a backtest's parameters."""
+    return (symbol, float(min_score), int(days_back))
+
+
+def _set_chart_state(key: Tuple[str, float, int], state: str, png: Optional[bytes] = None):
+    """Record a chart's state, evicting the least recently used charts."""
+    _CHART_CACHE[key] = (state, png, time.time())
+    _CHART_CACHE.move_to_end(key)
+    while len(_CHART_CACHE) > CHART_CACHE_SIZE:
+        _CHART_CACHE.popitem(last=False)
 
 
 async def generate_impact_chart(
     symbol: str,
-    backtest_result: Dict[str, Any]
-) -> Optional[str]:
+    backtest_result: Dict[str, Any],
+    key: Optional[Tuple[str, float, int]] = None
+) -> Optional[bytes]:
     """
     Generate impact chart from backtest result.
     
+    The PNG is kept in memory under key and served by get_impact_chart;
+    nothing is written to disk. A chart that cannot be rendered is
+    recorded as failed, so pollers stop waiting for it.
+    
     Args:
         symbol: Stock ticker symbol
         backtest_result: Result from impact_model.run_backtest()
+        key: chart_key of the backtest parameters (defaults to the
+            price impact endpoint's defaults)
     
     Returns:
-        Path to generated chart or None if failed
+        PNG bytes of the chart or None if failed
     """
+    if key is None:
+        key = chart_key(symbol, 0.7, 180)
+    
+    png = await _render_impact_chart(symbol, backtest_result)
+    _set_chart_state(key, CHART_FAILED if png is None else CHART_READY, png)
+    return png
+
+
+async def _render_impact_chart(
+    symbol: str,
+    backtest_result: Dict[str, Any]
+) -> Optional[bytes]:
+    """PNG of the chart for a backtest result, or None if it cannot be rendered."""
     if backtest_result.get('status') != 'success':
         return None
     
@@ -138,21 +300,59 @@ async def generate_impact_chart(
         if not events:
             return None
         
-        # Download price data again for visualization
-        start_date = datetime.fromisoformat(price_range['start'])
-        end_date = datetime.fromisoformat(price_range['end'])
-        
-        ticker = yf.Ticker(symbol)
-        price_data = ticker.history(start=start_date, end=end_date)
+        # Reuse the prices the backtest downloaded; otherwise fetch the same
+        # range through the impact model's price cache (memory, then disk)
+        price_data = backtest_result.get('price_data')
+        if price_data is None:
+            start_date = datetime.fromisoformat(price_range['start'])
+            end_date = datetime.fromisoformat(price_range['end'])
+            
+            loop = asyncio.get_event_loop()
+            price_data = await loop.run_in_executor(
+                None,
+                impact_model.download_price_data,
+                symbol,
+                start_date,
+                end_date
+            )
         
-        if price_data.empty:
+        if price_data is None or price_data.empty:
             return None
         
-        # Generate chart
-        chart_path = plot_price_impact(symbol, price_data, events)
+        # Generate chart (CPU-bound; rendered in a worker process)
+        loop = asyncio.get_event_loop()
+        png = await loop.run_in_executor(
+            _chart_pool(),
+            render_price_impact,
+            symbol,
+            price_data,
+            events
+        )
         
-        return chart_path
+        return png
     
     except Exception as e:
         print(f"Error generating chart for {symbol}: {e}")
         return None
+
+
+def mark_chart_pending(key: Tuple[str, float, int]):
+    """Record that a chart is being rendered, replacing any earlier chart for key."""
+    _set_chart_state(key, CHART_PENDING)
+
+
+def get_impact_chart(key: Tuple[str, float, int]) -> Optional[Tuple[str, Optional[bytes], float]]:
+    """
+    Latest state of the chart for a backtest's parameters.
+    
+    Args:
+        key: chart_key(symbol, min_score, days_back)
+    
+    Returns:
+        (state, PNG bytes or None, time of the state change as epoch
+        seconds), or None if the chart was never requested or was evicted
+    """
+    chart = _CHART_CACHE.get(key)
+    if chart is not None:
+        _CHART_CACHE.move_to_end(key)
+    return chart
@@ -4,17 +4,109 @@ Analysis API Routes
 Endpoints for price impact analysis and backtesting.
 """
 
-from fastapi import APIRouter, HTTPException, Query, Path
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Path, Request, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
+from sqlalchemy import text
 from typing import Dict, Any, List, Optional
-from datetime import datetime
+from datetime import datetime, date
+from email.utils import formatdate, parsedate_to_datetime
+import asyncio
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
 
 from analysis.impact_model import impact_model
 from analysis.helpers import get_sentiment_events, get_supported_symbols
-from analysis.visualizations import generate_impact_chart
+from analysis.visualizations import (
+    CHART_FAILED,
+    CHART_PENDING,
+    REPORTS_DIR,
+    chart_key,
+    generate_impact_chart,
+    get_impact_chart,
+    mark_chart_pending
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Successful backtests by (symbol, min_score, days_back, day, events); a
+# repeat request skips the price download and return computation
+BACKTEST_CACHE_DIR = REPORTS_DIR / ".backtest_cache"
+
+
+def _etag(content: bytes) -> str:
+    """Strong ETag (quoted MD5 hex digest) of a response payload."""
+    return '"' + hashlib.md5(content).hexdigest() + '"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already names etag (client copy is current)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def _backtest_cache_path(symbol: str, min_score: float, days_back: int, events: List[Dict[str, Any]]):
+    """
+    Cache file for a backtest of these events today.
+    
+    The event ids are part of the key, so newly ingested articles give a
+    new entry instead of a stale result.
+    """
+    today = date.today().isoformat()
+    event_ids = ",".join(str(e['article_id']) for e in events)
+    key = f"{symbol}:{min_score}:{days_back}:{today}:{event_ids}"
+    return BACKTEST_CACHE_DIR / f"{today}_{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+
+def _load_backtest(path) -> Optional[Dict[str, Any]]:
+    """Read a cached backtest result, with event timestamps as datetimes again."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    for event in result.get('events') or []:
+        event['timestamp'] = datetime.fromisoformat(event['timestamp'])
+    return result
+
+
+def _json_default(value):
+    """JSON form of the non-JSON values in a backtest result (dates, numpy scalars)."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _store_backtest(path, result: Dict[str, Any]):
+    """Write a backtest result (without price_data) and drop earlier days' entries."""
+    cached = {key: value for key, value in result.items() if key != 'price_data'}
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        BACKTEST_CACHE_DIR.mkdir(exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cached, f, default=_json_default)
+        os.replace(tmp_path, path)
+        
+        today = date.today().isoformat()
+        for old_path in BACKTEST_CACHE_DIR.glob("*.json"):
+            if not old_path.name.startswith(today):
+                old_path.unlink(missing_ok=True)
+    except (OSError, TypeError, ValueError) as e:
+        tmp_path.unlink(missing_ok=True)
+        logger.warning(f"Could not write backtest cache {path}: {e}")
+
 
 class PriceImpactResponse(BaseModel):
     """Price impact backtest response model."""
@@ -26,7 +118,8 @@ class PriceImpactResponse(BaseModel):
     price_data_range: Optional[Dict[str, Any]] = Field(None, description="Price data date range")
     summary: Optional[Dict[str, Any]] = Field(None, description="Aggregated metrics")
     events: Optional[List[Dict[str, Any]]] = Field(None, description="Per-event results")
-    chart_path: Optional[str] = Field(None, description="Path to generated chart")
+    chart_path: Optional[str] = Field(None, description="URL of the generated chart")
+    chart_status: Optional[str] = Field(None, description="pending while the chart is rendered in the background")
 
 
 @router.get(
@@ -37,6 +130,8 @@ class PriceImpactResponse(BaseModel):
     tags=["Analysis"]
 )
 async def get_price_impact(
+    background_tasks: BackgroundTasks,
+    response: Response,
     symbol: str = Path(..., description="Stock ticker symbol (e.g., HDFCBANK, RELIANCE)"),
     min_score: float = Query(0.7, ge=0.0, le=1.0, description="Minimum sentiment score threshold"),
     days_back: int = Query(180, ge=30, le=730, description="Days to look back for events"),
@@ -52,10 +147,16 @@ async def get_price_impact(
     4. Aggregate metrics by sentiment label
     5. Optionally generate visualization chart
     
+    Successful backtests are cached for the rest of the day; a repeat
+    request with the same events skips steps 2-4.
+    
     **Returns:**
     - Summary metrics (avg_return, winrate, count) for positive/negative sentiment
     - Per-event results with forward returns
-    - Chart path if generate_chart=true
+    - Chart URL if generate_chart=true, specific to this request's
+      parameters; the chart is rendered after the response is sent (HTTP
+      202, chart_status "pending") and the URL answers 202 until it is
+      ready, then serves the PNG
     
     **Example Response:**
     ```json
@@ -90,13 +191,27 @@ async def get_price_impact(
                 event_count=0
             )
         
-        # Run backtest
-        result = await impact_model.run_backtest(symbol, events)
+        # Run backtest, unless these events were already backtested today
+        # (file I/O runs off the event loop)
+        cache_path = _backtest_cache_path(symbol, min_score, days_back, events)
+        result = await asyncio.to_thread(_load_backtest, cache_path)
+        if result is None:
+            result = await impact_model.run_backtest(symbol, events)
+            if result.get('status') == 'success':
+                await asyncio.to_thread(_store_backtest, cache_path, result)
         
-        # Generate chart if requested
+        # Generate chart if requested, off the request path
         chart_path = None
+        chart_status = None
         if generate_chart and result.get('status') == 'success':
-            chart_path = await generate_impact_chart(symbol, result)
+            # Pending from now on, so pollers never get an earlier chart for
+            # these parameters
+            key = chart_key(symbol, min_score, days_back)
+            mark_chart_pending(key)
+            background_tasks.add_task(generate_impact_chart, symbol, result, key)
+            chart_path = f"/analysis/chart/{symbol}?min_score={min_score}&days_back={days_back}"
+            chart_status = "pending"
+            response.status_code = 202
         
         return PriceImpactResponse(
             status=result.get('status', 'error'),
@@ -107,7 +222,8 @@ async def get_price_impact(
             price_data_range=result.get('price_data_range'),
             summary=result.get('summary'),
             events=result.get('events'),
-            chart_path=chart_path
+            chart_path=chart_path,
+            chart_status=chart_status
         )
     
     except Exception as e:
@@ -117,13 +233,69 @@ async def get_price_impact(
         )
 
 
+@router.get(
+    "/chart/{symbol}",
+    summary="Get Price Impact Chart",
+    description="Returns the PNG chart rendered by a price impact request with generate_chart=true.",
+    tags=["Analysis"],
+    response_class=Response,
+    responses={200: {"content": {"image/png": {}}}}
+)
+async def get_chart(
+    request: Request,
+    symbol: str = Path(..., description="Stock ticker symbol (e.g., HDFCBANK, RELIANCE)"),
+    min_score: float = Query(0.7, ge=0.0, le=1.0, description="min_score of the price impact request"),
+    days_back: int = Query(180, ge=30, le=730, description="days_back of the price impact request")
+) -> Response:
+    """
+    Serve a rendered price impact chart from memory.
+    
+    Charts are kept per (symbol, min_score, days_back) for the most
+    recently charted requests. 202 means the chart is still being
+    rendered, 500 that rendering failed, and 404 that it was never
+    requested (or was evicted). Responses carry ETag and Last-Modified,
+    and conditional requests for an unchanged chart get 304.
+    """
+    chart = get_impact_chart(chart_key(symbol, min_score, days_back))
+    if chart is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No chart available for {symbol}; request /analysis/price-impact/{symbol}?generate_chart=true"
+        )
+    
+    state, png, rendered_at = chart
+    if state == CHART_PENDING:
+        return JSONResponse(status_code=202, content={"symbol": symbol, "chart_status": state})
+    if state == CHART_FAILED:
+        raise HTTPException(status_code=500, detail=f"Chart rendering failed for {symbol}")
+    
+    headers = {
+        "ETag": _etag(png),
+        "Last-Modified": formatdate(rendered_at, usegmt=True)
+    }
+    
+    if _etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    
+    # If-Modified-Since is only consulted without If-None-Match (RFC 9110)
+    since = request.headers.get("if-modified-since")
+    if since and "if-none-match" not in request.headers:
+        try:
+            if int(rendered_at) <= parsedate_to_datetime(since).timestamp():
+                return Response(status_code=304, headers=headers)
+        except (TypeError, ValueError):
+            pass
+    
+    return Response(content=png, media_type="image/png", headers=headers)
+
+
 @router.get(
     "/supported-symbols",
     summary="Get Supported Stock Symbols",
     description="Returns list of stock symbols that have sentiment data available for analysis.",
     tags=["Analysis"]
 )
-async def get_symbols() -> Dict[str, Any]:
+async def get_symbols(request: Request, response: Response) -> Dict[str, Any]:
     """
     Get list of stock symbols with available sentiment data.
     
@@ -131,6 +303,9 @@ async def get_symbols() -> Dict[str, Any]:
     - List of supported symbols
     - Count of unique symbols
     
+    The ETag header identifies the symbol list; a request whose
+    If-None-Match matches it gets an empty 304 response.
+    
     **Example Response:**
     ```json
     {
@@ -143,6 +318,11 @@ async def get_symbols() -> Dict[str, Any]:
     try:
         symbols = await get_supported_symbols(limit=100)
         
+        etag = _etag(json.dumps(symbols).encode("utf-8"))
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        
         return {
             "symbols": symbols,
             "count": len(symbols),
@@ -167,6 +347,73 @@ class RiskMonitorResponse(BaseModel):
     updated_at: str = Field(..., description="Timestamp of analysis")
 
 
+# Negative articles for a sector - since sectors array is often empty, we
+# search in the article text as fallback. Both conditions use GIN indexes
+# (see migration 002)
+_NEGATIVE_ARTICLES_SQL = """
+    FROM articles a
+    JOIN sentiment s ON a.id = s.article_id
+    JOIN entities e ON a.id = e.article_id
+    WHERE s.label = 'negative'
+      AND s.score >= :min_sentiment
+      AND a.published_at >= NOW() - make_interval(days => :days_back)
+      AND (
+          e.sectors @> ARRAY[:sector] OR
+          a.text ILIKE :sector_pattern
+      )
+    ORDER BY s.score DESC, a.published_at DESC
+"""
+
+# Totals over the strongest 100 negative articles and the top companies
+# (>= 2 negative mentions); the LEFT JOIN keeps the totals row when no
+# company qualifies. Article text is not selected
+_RISK_STATS_SQL = text(f"""
+    WITH neg AS (
+        SELECT s.score AS sentiment_score, e.companies
+        {_NEGATIVE_ARTICLES_SQL}
+        LIMIT 100
+    ),
+    totals AS (
+        SELECT COUNT(*) AS negative_count, AVG(sentiment_score) AS avg_score
+        FROM neg
+    ),
+    company_stats AS (
+        SELECT
+            company,
+            COUNT(*) AS negative_count,
+            AVG(sentiment_score) AS avg_score
+        FROM neg, unnest(neg.companies) AS company
+        GROUP BY company
+        HAVING COUNT(*) >= 2
+        ORDER BY negative_count DESC, avg_score DESC, company
+        LIMIT 10
+    )
+    SELECT
+        t.negative_count AS total_count,
+        t.avg_score AS total_avg_score,
+        c.company,
+        c.negative_count,
+        c.avg_score
+    FROM totals t
+    LEFT JOIN company_stats c ON TRUE
+    ORDER BY c.negative_count DESC, c.avg_score DESC, c.company
+""")
+
+# Recent alerts: the top 20 negative articles, with the text preview and
+# first 3 companies cut in Postgres instead of shipping whole articles
+_RISK_ALERTS_SQL = text(f"""
+    SELECT 
+        a.id,
+        LEFT(a.text, 200) AS text_preview,
+        char_length(a.text) > 200 AS truncated,
+        a.published_at,
+        s.score as sentiment_score,
+        e.companies[1:3] AS companies
+    {_NEGATIVE_ARTICLES_SQL}
+    LIMIT 20
+""")
+
+
 @router.get(
     "/risk-monitor",
     response_model=RiskMonitorResponse,
@@ -201,47 +448,26 @@ async def risk_monitor(
     """
     try:
         from database import db
-        from sqlalchemy import text
         
         # Initialize database
         db.init_db()
         session = await db.get_session()
         
-        # Query negative articles - since sectors array is often empty,
-        # we search in the article text as fallback
-        query = text(f"""
-            SELECT 
-                a.id,
-                a.text,
-                a.published_at,
-                s.score as sentiment_score,
-                e.companies,
-                e.sectors
-            FROM articles a
-            JOIN sentiment s ON a.id = s.article_id
-            JOIN entities e ON a.id = e.article_id
-            WHERE s.label = 'negative'
-              AND s.score >= :min_sentiment
-              AND a.published_at >= NOW() - INTERVAL '{days_back} days'
-              AND (
-                  :sector = ANY(e.sectors) OR
-                  a.text ILIKE '%' || :sector || '%'
-              )
-            ORDER BY s.score DESC, a.published_at DESC
-            LIMIT 100
-        """)
+        # All values are bound, so the statement text is the same for every
+        # request and its prepared plan is reused
+        params = {
+            "min_sentiment": min_sentiment,
+            "days_back": days_back,
+            "sector": sector,
+            "sector_pattern": f"%{sector}%"
+        }
         
-        result = await session.execute(
-            query,
-            {
-                "min_sentiment": min_sentiment,
-                "sector": sector
-            }
-        )
-        rows = result.fetchall()
+        # Totals and top companies, aggregated in Postgres
+        result = await session.execute(_RISK_STATS_SQL, params)
+        stats_rows = result.fetchall()
         
         # Process results
-        negative_count = len(rows)
+        negative_count = stats_rows[0].total_count
         
         if negative_count == 0:
             return RiskMonitorResponse(
@@ -254,44 +480,29 @@ async def risk_monitor(
                 updated_at=datetime.now().isoformat()
             )
         
-        # Calculate average sentiment score
-        avg_score = sum(row.sentiment_score for row in rows) / len(rows)
-        
-        # Count company mentions
-        company_risks = {}
-        for row in rows:
-            if row.companies:
-                for company in row.companies:
-                    if company not in company_risks:
-                        company_risks[company] = {
-                            "company": company,
-                            "negative_count": 0,
-                            "avg_score": 0.0,
-                            "scores": []
-                        }
-                    company_risks[company]["negative_count"] += 1
-                    company_risks[company]["scores"].append(row.sentiment_score)
-        
-        # Calculate company risk scores and sort
-        high_risk_companies = []
-        for company, data in company_risks.items():
-            data["avg_score"] = sum(data["scores"]) / len(data["scores"])
-            data.pop("scores")  # Remove raw scores
-            if data["negative_count"] >= 2:  # At least 2 negative mentions
-                high_risk_companies.append(data)
+        avg_score = float(stats_rows[0].total_avg_score)
         
-        high_risk_companies.sort(key=lambda x: (x["negative_count"], x["avg_score"]), reverse=True)
-        high_risk_companies = high_risk_companies[:10]  # Top 10
+        high_risk_companies = [
+            {
+                "company": row.company,
+                "negative_count": row.negative_count,
+                "avg_score": float(row.avg_score)
+            }
+            for row in stats_rows
+            if row.company is not None
+        ]
         
         # Recent alerts (top 20)
+        result = await session.execute(_RISK_ALERTS_SQL, params)
+        
         recent_alerts = []
-        for row in rows[:20]:
+        for row in result.fetchall():
             recent_alerts.append({
                 "article_id": row.id,
-                "text": row.text[:200] + "..." if len(row.text) > 200 else row.text,
+                "text": row.text_preview + "..." if row.truncated else row.text_preview,
                 "published_at": row.published_at.isoformat(),
                 "sentiment_score": round(row.sentiment_score, 3),
-                "companies": row.companies[:3] if row.companies else []
+                "companies": row.companies or []
             })
         
         # Determine risk level
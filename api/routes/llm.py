@@ -23,6 +23,7 @@ class LLMStats(BaseModel):
     total_tokens: int = Field(..., description="Total tokens (input + output)")
     total_failures: int = Field(..., description="Total failed API calls")
     failure_rate: float = Field(..., description="Failure rate (0.0 to 1.0)")
+    total_cache_hits: int = Field(0, description="Responses served from cache without an API call")
     avg_latency_ms: float = Field(..., description="Average latency in milliseconds")
     cost_estimation_usd: float = Field(..., description="Estimated cost in USD")
     cost_per_1m_tokens_usd: float = Field(..., description="Cost per 1M tokens in USD")
@@ -64,6 +65,7 @@ async def get_llm_stats() -> LLMStats:
       "total_tokens": 60000,
       "total_failures": 2,
       "failure_rate": 0.0132,
+      "total_cache_hits": 37,
       "avg_latency_ms": 342.15,
       "cost_estimation_usd": 0.012,
       "cost_per_1m_tokens_usd": 0.20
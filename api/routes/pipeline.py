@@ -2,12 +2,9 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
-import sys
-import os
 import asyncio
-
-# Add project root to path for imports
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import threading
+import uuid
 
 from agents.dedup.agent import DeduplicationAgent
 from agents.entity.agent import EntityAgent
@@ -40,16 +37,43 @@ _pipeline_status = {
     "last_run": None
 }
 
+# Background pipeline runs started by POST /run, by job id (oldest first);
+# finished jobs beyond MAX_JOBS are dropped
+MAX_JOBS = 100
+_jobs: Dict[str, Dict[str, Any]] = {}
+_job_tasks = set()  # strong references, so running tasks are not collected
+
+
+_agents_lock = threading.Lock()
+
+
+def init_agents():
+    """
+    Construct all agents once (singleton pattern).
+    
+    Called at startup by main.py's background loader so models are warm
+    before the first request; the lock keeps a request arriving during
+    warm-up (or two first requests) from loading them a second time.
+    """
+    with _agents_lock:
+        if _agents["query"] is not None:
+            return
+        
+        # Published together, so readers never see a partial set
+        _agents.update({
+            "dedup": DeduplicationAgent(threshold=0.80),
+            "entity": EntityAgent(),
+            "sentiment": SentimentAgent(),
+            "llm": LLMAgent(),
+            "query": QueryAgent()
+        })
+
 
 def get_agents():
-    """Lazy-load agents on first use (singleton pattern)."""
-    if _agents["dedup"] is None:
+    """Shared agents; constructed here only if startup warm-up has not run."""
+    if _agents["query"] is None:
         try:
-            _agents["dedup"] = DeduplicationAgent(threshold=0.80)
-            _agents["entity"] = EntityAgent()
-            _agents["sentiment"] = SentimentAgent()
-            _agents["llm"] = LLMAgent()
-            _agents["query"] = QueryAgent()
+            init_agents()
         except Exception as e:
             raise HTTPException(
                 status_code=500,
@@ -87,46 +111,64 @@ async def run_pipeline_graph(articles: List[Dict[str, Any]]) -> Dict[str, Any]:
     Returns:
         Dict with pipeline results and statistics
     """
+    # Database writes and summaries started as tasks; any still running when
+    # a stage fails are cancelled and awaited, not left behind
+    tasks = []
     try:
         # Get agent instances
         dedup_agent, entity_agent, sentiment_agent, llm_agent, query_agent = get_agents()
         
+        # Database writes run as tasks alongside the next CPU stage (agents
+        # run in worker threads) and are awaited together at the end
+        
         # Step 1: Save raw articles to database
-        await db.save_articles(articles)
+        save_raw = asyncio.create_task(db.save_articles(articles))
+        tasks.append(save_raw)
         
         # Step 2: Deduplication
-        dedup_result = dedup_agent.run(articles)
+        dedup_result = await dedup_agent.run_async(articles)
         unique_articles = dedup_result["unique_articles"]
         clusters = dedup_result["clusters"]
         
         # Save dedup results to database
-        await db.save_dedup_results(dedup_result)
+        save_dedup = asyncio.create_task(db.save_dedup_results(dedup_result))
+        tasks.append(save_dedup)
         
-        # Step 3: Entity extraction
-        enriched_articles = entity_agent.run(unique_articles)
+        # Step 3: Entity extraction (on copies: save_raw may still be
+        # reading the original article dicts)
+        enriched_articles = await asyncio.to_thread(entity_agent.run, unique_articles, compact=True)
         
-        # Save entities to database
-        for article in enriched_articles:
-            if "entities" in article:
-                await db.save_entities(article["id"], article["entities"])
+        # Save entities to database (one bulk INSERT)
+        save_entities = asyncio.create_task(db.save_entities_bulk(
+            [(article["id"], article["entities"]) for article in enriched_articles if "entities" in article]
+        ))
+        tasks.append(save_entities)
         
         # Step 4: Sentiment analysis
-        sentiment_articles = sentiment_agent.run(enriched_articles)
+        sentiment_articles = await asyncio.to_thread(sentiment_agent.run, enriched_articles)
         
-        # Save sentiment to database
-        for article in sentiment_articles:
-            if "sentiment" in article:
-                await db.save_sentiment(article["id"], article["sentiment"])
+        # Save sentiment to database (one bulk INSERT)
+        save_sentiments = asyncio.create_task(db.save_sentiments_bulk(
+            [(article["id"], article["sentiment"]) for article in sentiment_articles if "sentiment" in article]
+        ))
+        tasks.append(save_sentiments)
         
         # Step 5: LLM enrichment (optional - for logging/debugging)
-        # Generate summaries for first 3 articles as demo
+        # Generate summaries for first 3 articles as demo; the requests are
+        # awaited alongside indexing, so neither waits on the other
+        summarize = None
         if sentiment_articles and len(sentiment_articles) > 0:
-            sample_summaries = llm_agent.run(sentiment_articles[:3], operation="summarize")
-            # Store summaries in pipeline metadata (optional logging)
-            _pipeline_status["last_summaries"] = sample_summaries
+            summarize = asyncio.create_task(llm_agent.run_async(sentiment_articles[:3], operation="summarize"))
+            tasks.append(summarize)
         
         # Step 6: Index into vector database
-        query_agent.index_articles(sentiment_articles)
+        await asyncio.to_thread(query_agent.index_articles_bulk, sentiment_articles)
+        
+        if summarize is not None:
+            # Store summaries in pipeline metadata (optional logging)
+            _pipeline_status["last_summaries"] = await summarize
+        
+        await asyncio.gather(save_raw, save_dedup, save_entities, save_sentiments)
         
         return {
             "status": "ok",
@@ -143,6 +185,11 @@ async def run_pipeline_graph(articles: List[Dict[str, Any]]) -> Dict[str, Any]:
             status_code=500,
             detail=f"Pipeline execution failed: {str(e)}"
         )
+    
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
 
 async def run_pipeline_on_articles(articles: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -204,35 +251,72 @@ class QueryResponse(BaseModel):
     results: List[Dict[str, Any]]
 
 
-@router.post("/run")
-async def run_pipeline():
-    """
-    Execute the full pipeline: ingest → dedup → entity → sentiment → index.
-    Persists results to PostgreSQL database.
+async def _execute_pipeline_job(job_id: str, articles: List[Dict[str, Any]]):
+    """Run the pipeline for a queued job and record its outcome in _jobs."""
+    job = _jobs[job_id]
+    job["status"] = "running"
     
-    Returns:
-        Pipeline execution summary with statistics
-    """
     try:
-        # Load demo articles
-        articles = load_demo_articles()
-        
-        # Run the pipeline graph (now async with DB writes)
         result = await run_pipeline_graph(articles)
+    except HTTPException as e:
+        job["status"] = "failed"
+        job["error"] = e.detail
+    except Exception as e:
+        job["status"] = "failed"
+        job["error"] = f"Unexpected error in pipeline: {str(e)}"
+    else:
+        job["status"] = "completed"
+        job["result"] = result
         
-        # Update global status
+        # Update global status (last completed run)
         _pipeline_status["status"] = "completed"
         _pipeline_status["last_run"] = result
-        
-        return result
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Unexpected error in pipeline: {str(e)}"
-        )
+    
+    job["finished_at"] = datetime.utcnow().isoformat()
+
+
+def _prune_jobs():
+    """Drop the oldest finished jobs once more than MAX_JOBS are tracked."""
+    finished = [job_id for job_id, job in _jobs.items() if job["status"] in ("completed", "failed")]
+    for job_id in finished[:max(0, len(_jobs) - MAX_JOBS)]:
+        del _jobs[job_id]
+
+
+@router.post("/run", status_code=202)
+async def run_pipeline():
+    """
+    Start the full pipeline: ingest → dedup → entity → sentiment → index.
+    Persists results to PostgreSQL database.
+    
+    The pipeline runs as a background job; this returns immediately with
+    its id. Poll GET /pipeline/status/{job_id} for progress and the result.
+    
+    Returns:
+        Job id, initial status and the status URL
+    """
+    # Load demo articles
+    articles = load_demo_articles()
+    
+    job_id = uuid.uuid4().hex
+    _jobs[job_id] = {
+        "job_id": job_id,
+        "status": "queued",
+        "submitted_at": datetime.utcnow().isoformat(),
+        "finished_at": None,
+        "result": None,
+        "error": None
+    }
+    _prune_jobs()
+    
+    task = asyncio.create_task(_execute_pipeline_job(job_id, articles))
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+    
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/pipeline/status/{job_id}"
+    }
 
 
 @router.get("/status")
@@ -252,6 +336,22 @@ def get_pipeline_status():
     return _pipeline_status["last_run"]
 
 
+@router.get("/status/{job_id}")
+def get_job_status(job_id: str):
+    """
+    Get the status of a pipeline job started by POST /pipeline/run.
+    
+    Returns:
+        Job status (queued, running, completed or failed), timestamps, and
+        the pipeline summary once completed or the error once failed
+    """
+    job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown pipeline job: {job_id}")
+    
+    return job
+
+
 @router.post(
     "/query",
     tags=["Query System"],
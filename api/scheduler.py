@@ -19,7 +19,7 @@ from dotenv import load_dotenv
 # Import ingestion and database modules
 from ingest.realtime import fetch_all, get_configured_feeds
 from database import db
-from vector_store.chroma_db import get_or_create_collection
+from vector_store.chroma_db import get_or_create_collection, mark_collection_written
 
 load_dotenv()
 
@@ -106,11 +106,11 @@ async def run_realtime_pipeline(articles: List[Dict[str, Any]]) -> Dict[str, Any
             entities = entity_agent.run(article)
             article["entities"] = entities
             articles_with_entities.append(article)
-            
-            # Save entities to database
-            await db.save_entities(article.get("id"), entities)
             entities_extracted += 1
         
+        # Save entities to database (one bulk INSERT)
+        await db.save_entities_bulk([(article.get("id"), article["entities"]) for article in articles_with_entities])
+        
         logger.info(f"   ✅ Extracted entities from {entities_extracted} articles")
         
         # STEP 3: Sentiment Analysis
@@ -118,14 +118,10 @@ async def run_realtime_pipeline(articles: List[Dict[str, Any]]) -> Dict[str, Any
         sentiment_agent = SentimentAgent()
         sentiment_articles = sentiment_agent.run(articles_with_entities)
         
-        # Save sentiment to database
-        for article in sentiment_articles:
-            sentiment = article.get("sentiment", {})
-            if sentiment:
-                await db.save_sentiment(
-                    article_id=article.get("id"),
-                    sentiment=sentiment
-                )
+        # Save sentiment to database (one bulk INSERT)
+        await db.save_sentiments_bulk(
+            [(article.get("id"), article["sentiment"]) for article in sentiment_articles if article.get("sentiment")]
+        )
         
         logger.info(f"   ✅ Analyzed sentiment for {len(sentiment_articles)} articles")
         
@@ -184,6 +180,7 @@ async def run_realtime_pipeline(articles: List[Dict[str, Any]]) -> Dict[str, Any
                 metadatas=metadatas,
                 ids=ids
             )
+            mark_collection_written()
             logger.info(f"   ✅ Indexed {len(documents)} articles into ChromaDB")
         
         # STEP 6: WebSocket Alerts (sentiment + summaries)
@@ -10,7 +10,7 @@ Provides connection pooling and helper functions to persist:
 """
 
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy import select, insert
 from dotenv import load_dotenv
@@ -116,11 +116,13 @@ async def run_migrations():
     try:
         # Import migration modules
         from database.migrations.migration_001_add_hash_column import run_migration as run_001
+        from database.migrations.migration_002_add_search_indexes import run_migration as run_002
         
         # Run migrations in order
         logger.info("🔄 Running database migrations...")
         
         success = await run_001(engine)
+        success = await run_002(engine) and success
         
         if success:
             logger.info("✅ All migrations completed successfully")
@@ -390,6 +392,95 @@ async def save_sentiment(article_id: int, sentiment: Dict[str, Any]) -> bool:
         return False
 
 
+async def save_entities_bulk(rows: List[Tuple[int, Dict[str, Any]]]) -> int:
+    """
+    Save extracted entities for many articles with one multi-row INSERT.
+    
+    One session, statement and commit for the whole batch instead of one
+    round-trip and commit per article (see save_entities).
+    
+    Args:
+        rows: (article_id, entities) pairs, entities as in save_entities
+    
+    Returns:
+        Number of entity rows saved (0 on failure)
+    """
+    if not async_session_factory:
+        logger.warning("Database not initialized. Skipping entity save.")
+        return 0
+    
+    if not rows:
+        return 0
+    
+    try:
+        session = await get_session()
+        async with session:
+            await session.execute(
+                insert(Entity),
+                [
+                    {
+                        "article_id": article_id,
+                        "companies": entities.get("companies", []),
+                        "sectors": entities.get("sectors", []),
+                        "regulators": entities.get("regulators", []),
+                        "people": entities.get("people", []),
+                        "events": entities.get("events", []),
+                        "stocks": entities.get("impacted_stocks", [])
+                    }
+                    for article_id, entities in rows
+                ]
+            )
+            await session.commit()
+            
+            logger.info(f"✅ Saved entities for {len(rows)} articles")
+            return len(rows)
+    
+    except Exception as e:
+        logger.error(f"❌ Failed to save entities for {len(rows)} articles: {str(e)}")
+        return 0
+
+
+async def save_sentiments_bulk(rows: List[Tuple[int, Dict[str, Any]]]) -> int:
+    """
+    Save sentiment results for many articles with one multi-row INSERT.
+    
+    Args:
+        rows: (article_id, sentiment) pairs, sentiment as in save_sentiment
+    
+    Returns:
+        Number of sentiment rows saved (0 on failure)
+    """
+    if not async_session_factory:
+        logger.warning("Database not initialized. Skipping sentiment save.")
+        return 0
+    
+    if not rows:
+        return 0
+    
+    try:
+        session = await get_session()
+        async with session:
+            await session.execute(
+                insert(Sentiment),
+                [
+                    {
+                        "article_id": article_id,
+                        "label": sentiment.get("label", "neutral"),
+                        "score": sentiment.get("score", 0.0)
+                    }
+                    for article_id, sentiment in rows
+                ]
+            )
+            await session.commit()
+            
+            logger.info(f"✅ Saved sentiment for {len(rows)} articles")
+            return len(rows)
+    
+    except Exception as e:
+        logger.error(f"❌ Failed to save sentiment for {len(rows)} articles: {str(e)}")
+        return 0
+
+
 async def save_query_log(query: str, expanded_query: Optional[str], result_count: int) -> bool:
     """
     Save query log entry.
@@ -0,0 +1,94 @@
+"""
+Migration: Add GIN indexes for the risk monitor's sector search.
+
+This migration is idempotent and safe for production use with Neon PostgreSQL.
+It adds:
+1. pg_trgm extension
+2. Trigram GIN index on articles.text (substring ILIKE fallback)
+3. GIN index on entities.sectors (sectors @> ARRAY[:sector] lookups)
+
+Run automatically on application startup via database/db.py
+"""
+
+import logging
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+async def run_migration(engine: AsyncEngine) -> bool:
+    """
+    Create the pg_trgm extension and the sector search indexes.
+    
+    This migration is idempotent - it can be run multiple times safely.
+    Each step runs in its own transaction, so the sectors index is still
+    created when the role may not create extensions.
+    
+    Args:
+        engine: Async SQLAlchemy engine
+    
+    Returns:
+        True if migration succeeded, False otherwise
+    """
+    success = True
+    logger.info("🔄 Running migration: 002_add_search_indexes")
+    
+    # Step 1: trigram index for a.text ILIKE '%sector%'
+    try:
+        logger.info("   Step 1/2: Creating pg_trgm extension and text trigram index...")
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            await conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_articles_text_trgm
+                ON articles USING gin (text gin_trgm_ops)
+            """))
+        logger.info("   ✓ ix_articles_text_trgm ready")
+    except Exception as e:
+        logger.warning(f"   ⚠ Could not create trigram index (pg_trgm unavailable?): {e}")
+        success = False
+    
+    # Step 2: array index for e.sectors @> ARRAY[:sector]
+    try:
+        logger.info("   Step 2/2: Creating sectors GIN index...")
+        async with engine.begin() as conn:
+            await conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_entities_sectors_gin
+                ON entities USING gin (sectors)
+            """))
+        logger.info("   ✓ ix_entities_sectors_gin ready")
+    except Exception as e:
+        logger.error(f"   ❌ Could not create sectors index: {e}")
+        success = False
+    
+    if success:
+        logger.info("✅ Migration 002_add_search_indexes completed successfully")
+    return success
+
+
+async def rollback_migration(engine: AsyncEngine) -> bool:
+    """
+    Rollback migration by dropping the search indexes.
+    
+    The pg_trgm extension is left installed; other objects may use it.
+    
+    Args:
+        engine: Async SQLAlchemy engine
+    
+    Returns:
+        True if rollback succeeded, False otherwise
+    """
+    try:
+        logger.warning("🔄 Rolling back migration: 002_add_search_indexes")
+        
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP INDEX IF EXISTS ix_articles_text_trgm"))
+            await conn.execute(text("DROP INDEX IF EXISTS ix_entities_sectors_gin"))
+        
+        logger.info("✅ Rollback completed successfully")
+        return True
+    
+    except Exception as e:
+        logger.error(f"❌ Rollback failed: {e}")
+        logger.exception(e)
+        return False
@@ -9,7 +9,8 @@ Tables:
 - query_logs: Query history with expansion and result counts
 """
 
-from sqlalchemy import Column, Integer, BigInteger, String, Text, Float, DateTime, ARRAY, JSON, UniqueConstraint
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Float, DateTime, ARRAY, JSON, UniqueConstraint, Index, cast
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -59,6 +60,14 @@ class Entity(Base):
     created_at = Column(DateTime, nullable=False, default=func.now())
 
 
+# GIN index for JSONB containment lookups by stock symbol (analysis.helpers)
+Index("ix_entities_stocks_gin", cast(Entity.stocks, JSONB), postgresql_using="gin")
+
+# GIN index for sectors @> ARRAY[:sector] in the risk monitor; the trigram index
+# on articles.text needs pg_trgm and is created by migration 002
+Index("ix_entities_sectors_gin", Entity.sectors, postgresql_using="gin")
+
+
 class Sentiment(Base):
     """Sentiment analysis results."""
     __tablename__ = "sentiment"
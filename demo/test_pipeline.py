@@ -5,6 +5,7 @@ Demonstrates full pipeline execution and query functionality.
 
 import httpx
 import json
+import time
 from typing import Dict, Any
 
 
@@ -32,7 +33,20 @@ def test_pipeline_run():
         response = httpx.post(f"{BASE_URL}/pipeline/run", timeout=60.0)
         response.raise_for_status()
         
-        result = response.json()
+        # The pipeline runs as a background job; poll until it finishes
+        job = response.json()
+        print(f"\n⏳ Pipeline job {job['job_id']} queued")
+        while job['status'] in ("queued", "running"):
+            time.sleep(1)
+            response = httpx.get(f"{BASE_URL}/pipeline/status/{job['job_id']}", timeout=10.0)
+            response.raise_for_status()
+            job = response.json()
+        
+        if job['status'] != "completed":
+            print(f"\n❌ Pipeline failed: {job['error']}")
+            return False
+        
+        result = job['result']
         
         print("\n✅ Pipeline executed successfully!")
         print(f"\n📊 Statistics:")
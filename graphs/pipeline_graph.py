@@ -12,15 +12,10 @@ Orchestrates the multi-agent pipeline using LangGraph StateGraph:
 Each node is async and persists data to PostgreSQL.
 """
 
-import sys
-import os
 from datetime import datetime
 from typing import Dict, Any
 import logging
 
-# Add project root to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 from langgraph.graph import StateGraph, END
 from graphs.state import PipelineState
 from agents.dedup.agent import DeduplicationAgent
@@ -99,7 +94,7 @@ async def dedup_node(state: PipelineState) -> Dict[str, Any]:
         dedup_agent = agents["dedup"]
         
         # Run deduplication
-        dedup_result = dedup_agent.run(state.articles)
+        dedup_result = await dedup_agent.run_async(state.articles)
         unique_articles = dedup_result["unique_articles"]
         clusters = dedup_result["clusters"]
         
@@ -138,15 +133,15 @@ async def entity_node(state: PipelineState) -> Dict[str, Any]:
         entity_agent = agents["entity"]
         
         # Run entity extraction
-        enriched_articles = entity_agent.run(state.unique_articles)
+        enriched_articles = entity_agent.run(state.unique_articles, in_place=True, compact=True)
         
-        # Save entities to database and build entity dict
-        entities = {}
-        for article in enriched_articles:
-            article_id = article["id"]
-            if "entities" in article:
-                entities[article_id] = article["entities"]
-                await db.save_entities(article_id, article["entities"])
+        # Build entity dict and save it to database (one bulk INSERT)
+        entities = {
+            article["id"]: article["entities"]
+            for article in enriched_articles
+            if "entities" in article
+        }
+        await db.save_entities_bulk(list(entities.items()))
         
         state.entities = entities
         state.unique_articles = enriched_articles
@@ -177,16 +172,19 @@ async def sentiment_node(state: PipelineState) -> Dict[str, Any]:
         # Run sentiment analysis
         sentiment_articles = sentiment_agent.run(state.unique_articles)
         
-        # Save sentiment to database and build sentiment dict
+        # Build sentiment dict and save it to database (one bulk INSERT)
         from api.websocket.alerts import alert_manager
         
-        sentiment_data = {}
+        sentiment_data = {
+            article["id"]: article["sentiment"]
+            for article in sentiment_articles
+            if "sentiment" in article
+        }
+        await db.save_sentiments_bulk(list(sentiment_data.items()))
+        
         for article in sentiment_articles:
             article_id = article["id"]
             if "sentiment" in article:
-                sentiment_data[article_id] = article["sentiment"]
-                await db.save_sentiment(article_id, article["sentiment"])
-                
                 # Broadcast real-time alerts for high-confidence sentiment
                 sentiment = article["sentiment"]
                 label = sentiment.get("label", "").upper()
@@ -252,13 +250,12 @@ async def llm_node(state: PipelineState) -> Dict[str, Any]:
         agents = get_agents()
         llm_agent = agents["llm"]
         
-        # Generate summaries for all articles
-        summaries = []
-        for article in state.unique_articles[:5]:  # Limit to first 5 for demo
+        # Generate summaries concurrently
+        articles = state.unique_articles[:5]  # Limit to first 5 for demo
+        summaries = await llm_agent.run_async(articles)
+        
+        for article, summary in zip(articles, summaries):
             try:
-                summary = llm_agent.summarize_article(article)
-                summaries.append(summary)
-                
                 # Broadcast alerts based on LLM summary keywords
                 summary_text = summary.get("summary", "").lower()
                 article_id = article["id"]
@@ -287,7 +284,7 @@ async def llm_node(state: PipelineState) -> Dict[str, Any]:
                     logger.info(f"💰 EARNINGS_UPDATE alert: Article {article_id}")
                 
             except Exception as e:
-                logger.warning(f"Failed to summarize article {article['id']}: {str(e)}")
+                logger.warning(f"Failed to send alerts for article {article['id']}: {str(e)}")
         
         state.llm_outputs = {
             "summaries": summaries,
@@ -317,13 +314,13 @@ async def index_node(state: PipelineState) -> Dict[str, Any]:
     
     try:
         from vector_store import chroma_db
-        from sentence_transformers import SentenceTransformer
+        from agents.models import get_sentence_transformer
         
         # Get collection
         collection = chroma_db.get_or_create_collection(chroma_db.COLLECTION_NAME)
         
-        # Initialize embedding model
-        model = SentenceTransformer("sentence-transformers/all-mpnet-base-v2")
+        # Shared embedding model (loaded once per process)
+        model = get_sentence_transformer("sentence-transformers/all-mpnet-base-v2")
         
         # Get LLM summaries
         summaries = state.llm_outputs.get("summaries", []) if state.llm_outputs else []
@@ -368,6 +365,7 @@ async def index_node(state: PipelineState) -> Dict[str, Any]:
             documents=documents,
             metadatas=metadatas
         )
+        chroma_db.mark_collection_written(chroma_db.COLLECTION_NAME)
         
         state.index_done = True
         state.stats["indexed_count"] = len(state.unique_articles)
@@ -11,29 +11,24 @@ Orchestrates the query processing pipeline using LangGraph StateGraph:
 Each node processes the query state and passes it to the next stage.
 """
 
-import sys
-import os
 from datetime import datetime
 from typing import Dict, Any
 import logging
-import spacy
-
-# Add project root to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from langgraph.graph import StateGraph, END
 from graphs.state import QueryState
 from agents.llm.agent import LLMAgent
 from agents.query.agent import QueryAgent
+from agents.models import SPACY_NER_ONLY, get_sentence_transformer, get_spacy_model
 from database import db
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load spaCy model for entity extraction
+# Load spaCy model for entity extraction (only NER is used)
 try:
-    nlp = spacy.load("en_core_web_sm")
+    nlp = get_spacy_model("en_core_web_sm", disable=SPACY_NER_ONLY)
 except OSError:
     logger.warning("spaCy model not found. Install with: python -m spacy download en_core_web_sm")
     nlp = None
@@ -148,13 +143,12 @@ async def semantic_search_node(state: QueryState) -> Dict[str, Any]:
     
     try:
         from vector_store import chroma_db
-        from sentence_transformers import SentenceTransformer
         
         # Get collection
         collection = chroma_db.get_or_create_collection(chroma_db.COLLECTION_NAME)
         
-        # Initialize embedding model
-        model = SentenceTransformer("sentence-transformers/all-mpnet-base-v2")
+        # Shared embedding model (loaded once per process)
+        model = get_sentence_transformer("sentence-transformers/all-mpnet-base-v2")
         
         # Use expanded query if available, otherwise original
         search_query = state.expanded_query or state.query
@@ -16,9 +16,10 @@ print("=" * 60)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
-    Lifecycle manager - MUST be empty for instant port binding.
-    Routers will be loaded on first request.
+    Lifecycle manager - MUST NOT block, for instant port binding.
+    Routers and agents are loaded in a background thread started here.
     """
+    trigger_router_loading()
     print("\n✅ Lifespan started - port will bind now!")
     yield
     
@@ -77,6 +78,25 @@ def load_routers_sync():
         print(f"⚠️ Router loading error: {e}")
         import traceback
         traceback.print_exc()
+        return
+    
+    # PRELOAD_AGENTS=1 warms the agents so the first /pipeline request does
+    # not pay for loading them. Off by default: it loads FinBERT, mpnet,
+    # spaCy and the LLM pool (a few GB) into every worker process, even
+    # ones that never run the pipeline
+    if os.getenv("PRELOAD_AGENTS", "0") == "1":
+        print("📦 Background thread - warming agents...")
+        try:
+            # spaCy's device is process-wide, so pick it before any model loads
+            if os.getenv("SPACY_GPU", "0") == "1":
+                from agents.models import prefer_spacy_gpu
+                prefer_spacy_gpu()
+            
+            from api.routes.pipeline import init_agents
+            init_agents()
+            print("✅ Agents ready!")
+        except Exception as e:
+            print(f"⚠️ Agent warm-up error (will retry on first request): {e}")
 
 def trigger_router_loading():
     """Trigger router loading in background thread (non-blocking)"""
@@ -6,6 +6,7 @@ Ensures consistent collection naming and persistent storage across all agents.
 """
 
 import os
+import threading
 import chromadb
 from chromadb.config import Settings
 
@@ -21,6 +22,11 @@ COLLECTION_NAME = "finnews_articles"
 # Singleton client instance
 _client = None
 
+# Collection name -> writes made by this process, so readers caching query
+# results can tell when the collection has changed
+_write_versions = {}
+_write_versions_lock = threading.Lock()
+
 
 def get_client() -> chromadb.Client:
     """
@@ -73,9 +79,34 @@ def reset_collection(collection_name: str = COLLECTION_NAME):
         client.delete_collection(name=collection_name)
     except Exception:
         pass  # Collection might not exist
+    mark_collection_written(collection_name)
     return client.get_or_create_collection(name=collection_name)
 
 
+def mark_collection_written(collection_name: str = COLLECTION_NAME):
+    """
+    Record a write to a collection; call after every add/upsert/delete.
+    
+    Args:
+        collection_name: Name of the collection written to
+    """
+    with _write_versions_lock:
+        _write_versions[collection_name] = _write_versions.get(collection_name, 0) + 1
+
+
+def get_write_version(collection_name: str = COLLECTION_NAME) -> int:
+    """
+    Number of writes recorded for a collection by this process.
+    
+    Args:
+        collection_name: Name of the collection
+        
+    Returns:
+        Counter that changes whenever the collection is written to
+    """
+    return _write_versions.get(collection_name, 0)
+
+
 def list_collections():
     """
     List all collections in the ChromaDB instance.